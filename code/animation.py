@@ -0,0 +1,48 @@
+from settings import *
+
+class Animation:
+	def __init__(self, frames, speed):
+		self.frames = frames
+		self.speed = speed
+		self.frame_index = 0
+		self.image = frames[0]
+		self.members = {}
+
+	def advance(self, dt):
+		self.frame_index += self.speed * dt
+		self.image = self.frames[int(self.frame_index % len(self.frames))]
+
+class Animations(pygame.sprite.Group):
+	def __init__(self):
+		super().__init__()
+		# members are not updated one by one, whoever draws them reads sprite.animation.image
+		self.animations = {}
+		self.pending = {}
+
+	def add_internal(self, sprite, layer = None):
+		super().add_internal(sprite)
+		# the animation speed is assigned after the sprite joins its groups, so grouping waits for the next update
+		self.pending[sprite] = None
+
+	def remove_internal(self, sprite):
+		super().remove_internal(sprite)
+		if sprite in self.pending:
+			del self.pending[sprite]
+		else:
+			del sprite.animation.members[sprite]
+			sprite.animation = None
+
+	def flush(self):
+		for sprite in self.pending:
+			key = (id(sprite.frames), sprite.animation_speed)
+			if key not in self.animations:
+				self.animations[key] = Animation(sprite.frames, sprite.animation_speed)
+			sprite.animation = self.animations[key]
+			sprite.animation.members[sprite] = None
+		self.pending.clear()
+
+	def update(self, dt):
+		if self.pending:
+			self.flush()
+		for animation in self.animations.values():
+			animation.advance(dt)
@@ -1,20 +1,95 @@
 import pygame
+from bisect import bisect_left, bisect_right
+
+class LevelTimes:
+    # sorted lists rather than a tree: finding the slot is O(log n), the insert itself is an O(n) memmove,
+    # which stays far below a frame for any number of runs a player will record
+    def __init__(self):
+        self.times = []
+        self.entries = []
+        self.by_level = {}
+
+    def add(self, time, level):
+        index = bisect_right(self.times, time)
+        self.times.insert(index, time)
+        self.entries.insert(index, (time, level))
+        level_times = self.by_level.setdefault(level, [])
+        level_times.insert(bisect_right(level_times, time), time)
+
+    def load(self, entries):
+        # entries come back from storage already ordered by time
+        self.entries = [tuple(entry) for entry in entries]
+        self.times = [time for time, level in self.entries]
+        self.by_level = {}
+        for time, level in self.entries:
+            self.by_level.setdefault(level, []).append(time)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def fastest(self, k, level=None):
+        if level is None:
+            return self.entries[:k]
+        return [(time, level) for time in self.by_level.get(level, [])[:k]]
+
+    def between(self, low, high, level=None):
+        if level is None:
+            return self.entries[bisect_left(self.times, low):bisect_right(self.times, high)]
+        level_times = self.by_level.get(level, [])
+        return [(time, level) for time in level_times[bisect_left(level_times, low):bisect_right(level_times, high)]]
+
+    def find(self, value, tolerance=0.01):
+        index = bisect_right(self.times, value - tolerance)
+        if index < len(self.times) and self.times[index] - value < tolerance:
+            return index, self.entries[index][1]
+        return -1, None
+
 
 class Data:
-    def __init__(self, ui):
+    def __init__(self, ui, store=None):
         self.ui = ui
+        self.store = None
         self.initial_health = 3
-        self.level_times = []
+        self.level_times = LevelTimes()
         self.reset()
+        if store:
+            self.load(store)
 
     def reset(self):
         self._coins = 0
         self._health = self.initial_health
-        self.unlocked_level = 0
+        self._unlocked_level = 0
         self.current_level = 0
         if self.ui:
             self.ui.create_hearts(self._health)
             self.ui.show_coins(self._coins)
+        self.save()
+
+    def load(self, store):
+        progress, runs = store.load()
+        self.level_times.load(runs)
+        if progress.get('health', 0) > 0:
+            self._coins = progress.get('coins', self._coins)
+            self._health = progress['health']
+            self._unlocked_level = progress.get('unlocked_level', self._unlocked_level)
+            if self.ui:
+                self.ui.create_hearts(self._health)
+                self.ui.show_coins(self._coins)
+        self.store = store
+
+    def save(self):
+        if self.store:
+            if self._health > 0:
+                self.store.save_progress(coins=self._coins, health=self._health, unlocked_level=self._unlocked_level)
+            else:
+                # a lost game restarts from scratch, so quitting on the game over screen must not leave 0 health behind
+                self.store.save_progress(coins=0, health=self.initial_health, unlocked_level=0)
 
     @property
     def coins(self):
@@ -27,6 +102,7 @@ class Data:
             self.coins -= 100
             self.health += 1
         self.ui.show_coins(self.coins)
+        self.save()
 
     @property
     def health(self):
@@ -36,53 +112,26 @@ class Data:
     def health(self, value):
         self._health = value
         self.ui.create_hearts(value)
+        self.save()
 
-    def add_level_time(self, time, level):
-        self.level_times.append((round(time, 2), level))
-
-    def merge_sort(self, arr):
-        if len(arr) <= 1:
-            return arr
-
-        mid = len(arr) // 2
-        left = self.merge_sort(arr[:mid])
-        right = self.merge_sort(arr[mid:])
-
-        return self.merge(left, right)
-
-    def merge(self, left, right):
-        result = []
-        i = j = 0
-
-        while i < len(left) and j < len(right):
-            if left[i][0] <= right[j][0]:
-                result.append(left[i])
-                i += 1
-            else:
-                result.append(right[j])
-                j += 1
+    @property
+    def unlocked_level(self):
+        return self._unlocked_level
 
-        result.extend(left[i:])
-        result.extend(right[j:])
-        return result
+    @unlocked_level.setter
+    def unlocked_level(self, value):
+        self._unlocked_level = value
+        self.save()
 
-    def sort_level_times(self):
-        self.level_times = self.merge_sort(self.level_times)
+    def add_level_time(self, time, level):
+        time = round(time, 2)
+        self.level_times.add(time, level)
+        if self.store:
+            self.store.record_run(time, level)
 
     def binary_search(self, value):
-        self.sort_level_times()
-        left, right = 0, len(self.level_times) - 1
-
-        while left <= right:
-            mid = (left + right) // 2
-            if abs(self.level_times[mid][0] - value) < 0.01:
-                return mid, self.level_times[mid][1]
-            elif self.level_times[mid][0] < value:
-                left = mid + 1
-            else:
-                right = mid - 1
-        return -1, None
+        return self.level_times.find(value)
 
     def get_fastest_time(self):
-        self.sort_level_times()
-        return self.level_times[0] if self.level_times else (None, None)
\ No newline at end of file
+        fastest = self.level_times.fastest(1)
+        return fastest[0] if fastest else (None, None)
@@ -1,17 +1,19 @@
 from settings import * 
+from support import flip_frames
 from random import choice
 from timer import Timer
 
 class Tooth(pygame.sprite.Sprite):
-	def __init__(self, pos, frames, groups, collision_sprites):
+	def __init__(self, pos, frames, groups, grid):
 		super().__init__(groups)
 		self.frames, self.frame_index = frames, 0
+		self.flipped_frames = flip_frames(frames)
 		self.image = self.frames[self.frame_index]
 		self.rect = self.image.get_frect(topleft = pos)
 		self.z = Z_LAYERS['main']
 
 		self.direction = choice((-1,1))
-		self.collision_rects = [sprite.rect for sprite in collision_sprites]
+		self.grid = grid
 		self.speed = 100
 
 		self.hit_timer = Timer(250)
@@ -25,18 +27,18 @@ class Tooth(pygame.sprite.Sprite):
 		self.hit_timer.update()
 
 		self.frame_index += ANIMATION_SPEED * dt
-		self.image = self.frames[int(self.frame_index % len(self.frames))]
-		self.image = pygame.transform.flip(self.image, True, False) if self.direction < 0 else self.image
+		frames = self.flipped_frames if self.direction < 0 else self.frames
+		self.image = frames[int(self.frame_index % len(frames))]
 
 		self.rect.x += self.direction * self.speed * dt
 
 		floor_rect_right = pygame.FRect(self.rect.bottomright, (1,1))
-		floor_rect_left = pygame.FRect(self.rect.bottomleft, (-1,1))
+		floor_rect_left = pygame.FRect(self.rect.bottomleft + vector(-1,0), (1,1))
 		wall_rect = pygame.FRect(self.rect.topleft + vector(-1,0), (self.rect.width + 2, 1))
 
-		if floor_rect_right.collidelist(self.collision_rects) < 0 and self.direction > 0 or\
-		   floor_rect_left.collidelist(self.collision_rects) < 0 and self.direction < 0 or \
-		   wall_rect.collidelist(self.collision_rects) != -1:
+		if not self.grid.in_rect(floor_rect_right) and self.direction > 0 or\
+		   not self.grid.in_rect(floor_rect_left) and self.direction < 0 or \
+		   self.grid.in_rect(wall_rect):
 			self.direction *= -1
 
 class Shell(pygame.sprite.Sprite):
@@ -44,9 +46,7 @@ class Shell(pygame.sprite.Sprite):
 		super().__init__(groups)
 
 		if reverse:
-			self.frames = {}
-			for key, surfs in frames.items():
-				self.frames[key] = [pygame.transform.flip(surf, True, False) for surf in surfs]
+			self.frames = flip_frames(frames)
 			self.bullet_direction = -1
 		else:
 			self.frames = frames 
@@ -0,0 +1,41 @@
+from settings import *
+from math import ceil, floor
+
+SOLID = 1
+SEMI_SOLID = 2
+
+class TileGrid:
+	def __init__(self, width, height, cell_size = TILE_SIZE):
+		self.width, self.height = width, height
+		self.cell_size = cell_size
+		self.cells = bytearray(width * height)
+
+	def set(self, col, row, flag):
+		if 0 <= col < self.width and 0 <= row < self.height:
+			self.cells[row * self.width + col] |= flag
+
+	def get(self, col, row):
+		if 0 <= col < self.width and 0 <= row < self.height:
+			return self.cells[row * self.width + col]
+		return 0
+
+	def cell_range(self, rect):
+		# right and bottom are exclusive, so an edge lying on a tile border does not reach into the next cell
+		cols = range(floor(rect.left / self.cell_size), ceil(rect.right / self.cell_size))
+		rows = range(floor(rect.top / self.cell_size), ceil(rect.bottom / self.cell_size))
+		return cols, rows
+
+	def mark_rect(self, rect, flag):
+		# objects that are not tile aligned flag every cell they touch
+		cols, rows = self.cell_range(rect)
+		for col in cols:
+			for row in rows:
+				self.set(col, row, flag)
+
+	def in_rect(self, rect, flag = SOLID):
+		cols, rows = self.cell_range(rect)
+		for row in rows:
+			for col in cols:
+				if self.get(col, row) & flag:
+					return True
+		return False
@@ -1,43 +1,566 @@
 from settings import * 
-from sprites import Sprite, Cloud
+from support import flip_frames
 from random import choice, randint
+from collections import OrderedDict
+from array import array
+from bisect import insort
+from math import floor, ceil, sin, cos, radians
 from timer import Timer
+from animation import Animations
+
+class SpatialSprites(pygame.sprite.Group):
+	def __init__(self, cell_size = TILE_SIZE):
+		super().__init__()
+		self.cell_size = cell_size
+		self.cells = {}
+		self.sprite_cells = {}
+		self.order = {}
+		self.pending = {}
+		self.counter = 0
+
+	def add_internal(self, sprite, layer = None):
+		super().add_internal(sprite)
+		self.order[sprite] = self.counter
+		self.counter += 1
+		# sprites join their groups before they have a rect, so they are bucketed on first query
+		self.pending[sprite] = None
+
+	def remove_internal(self, sprite):
+		super().remove_internal(sprite)
+		self.pending.pop(sprite, None)
+		self.remove_from_cells(sprite)
+		del self.order[sprite]
+
+	def get_cells(self, rect):
+		left, right = int(rect.left // self.cell_size), int(rect.right // self.cell_size)
+		top, bottom = int(rect.top // self.cell_size), int(rect.bottom // self.cell_size)
+		return left, top, right, bottom
+
+	def insert(self, sprite):
+		bounds = self.get_cells(sprite.rect)
+		self.sprite_cells[sprite] = bounds
+		left, top, right, bottom = bounds
+		for x in range(left, right + 1):
+			for y in range(top, bottom + 1):
+				self.cells.setdefault((x, y), {})[sprite] = None
+
+	def remove_from_cells(self, sprite):
+		bounds = self.sprite_cells.pop(sprite, None)
+		if bounds:
+			left, top, right, bottom = bounds
+			for x in range(left, right + 1):
+				for y in range(top, bottom + 1):
+					del self.cells[(x, y)][sprite]
+
+	def relocate(self, sprite):
+		if sprite in self.sprite_cells and self.sprite_cells[sprite] != self.get_cells(sprite.rect):
+			self.remove_from_cells(sprite)
+			self.insert(sprite)
+
+	def flush(self):
+		for sprite in self.pending:
+			self.insert(sprite)
+		self.pending.clear()
+
+	def query(self, rect):
+		if self.pending:
+			self.flush()
+		left, top, right, bottom = self.get_cells(rect)
+		found = {}
+		for x in range(left, right + 1):
+			for y in range(top, bottom + 1):
+				cell = self.cells.get((x, y))
+				if cell:
+					found.update(cell)
+		return sorted(found, key = self.order.__getitem__)
+
+class TileChunks:
+	def __init__(self, chunk_tiles = 16, min_chunks = 24):
+		self.chunk_size = chunk_tiles * TILE_SIZE
+		self.min_chunks = min_chunks
+		self.max_chunks = min_chunks
+		self.tiles = {}
+		self.bounds = {}
+		self.keys = set()
+		self.surfaces = OrderedDict()
+		self.drawn = {}
+		self.frame = 0
+
+	def add(self, pos, surf, z, above_sprites = False):
+		# chunks marked above_sprites are drawn after the sprites of their z instead of before them
+		chunk = (z, above_sprites, int(pos[0] // self.chunk_size), int(pos[1] // self.chunk_size))
+		self.tiles.setdefault(chunk, []).append((pos, surf))
+		self.keys.add((z, above_sprites))
+		rect = surf.get_frect(topleft = pos)
+		self.bounds[chunk] = self.bounds[chunk].union(rect) if chunk in self.bounds else rect
+		self.surfaces.pop(chunk, None)
+
+	def begin_frame(self, size):
+		# every chunked layer can show this many chunks at once, so the cache must hold them all or a cyclic
+		# draw order evicts each chunk right before it is needed again
+		cols = ceil(size[0] / self.chunk_size) + 1
+		rows = ceil(size[1] / self.chunk_size) + 1
+		self.max_chunks = max(self.min_chunks, cols * rows * len(self.keys))
+		self.frame += 1
+
+	def get_surface(self, chunk):
+		self.drawn[chunk] = self.frame
+		if chunk in self.surfaces:
+			self.surfaces.move_to_end(chunk)
+			return self.surfaces[chunk]
+
+		bounds = self.bounds[chunk]
+		surf = pygame.Surface((int(bounds.width), int(bounds.height)), pygame.SRCALPHA)
+		for pos, tile in self.tiles[chunk]:
+			surf.blit(tile, (pos[0] - bounds.left, pos[1] - bounds.top))
+		self.surfaces[chunk] = surf
+		# chunks drawn this frame are never evicted, overhanging tiles can pull in more than the estimate
+		while len(self.surfaces) > self.max_chunks:
+			oldest = next(iter(self.surfaces))
+			if self.drawn[oldest] == self.frame:
+				break
+			del self.surfaces[oldest]
+		return surf
+
+	def draw(self, surface, offset, z, above_sprites = False):
+		view = pygame.FRect(-offset.x, -offset.y, *surface.get_size())
+		# one chunk of margin for tiles that overhang their chunk
+		left, right = int(view.left // self.chunk_size) - 1, int(view.right // self.chunk_size) + 1
+		top, bottom = int(view.top // self.chunk_size) - 1, int(view.bottom // self.chunk_size) + 1
+		for x in range(left, right + 1):
+			for y in range(top, bottom + 1):
+				chunk = (z, above_sprites, x, y)
+				if chunk in self.bounds and self.bounds[chunk].colliderect(view):
+					# floor so every tile lands on the same pixel as when blitted on its own
+					pos = self.bounds[chunk].topleft + offset
+					surface.blit(self.get_surface(chunk), (floor(pos.x), floor(pos.y)))
+
+class WaterRegions:
+	def __init__(self, animation_speed = ANIMATION_SPEED):
+		self.regions = {}
+		self.animation_speed = animation_speed
+		self.frame_index = 0
+		self.strips = {}
+
+	def add(self, rect, top_frames, body, z):
+		self.regions.setdefault(z, []).append((rect, top_frames, body))
+
+	def update(self, dt):
+		# every top tile starts on the same frame, so one index animates them all
+		self.frame_index += self.animation_speed * dt
+
+	def get_strip(self, tile, cols, rows):
+		key = (tile, cols, rows)
+		if key not in self.strips:
+			width, height = tile.get_size()
+			strip = pygame.Surface((cols * width, rows * height), pygame.SRCALPHA)
+			strip.fblits([(tile, (col * width, row * height)) for col in range(cols) for row in range(rows)])
+			self.strips[key] = strip
+		return self.strips[key]
+
+	def draw(self, surface, offset, z):
+		view = pygame.FRect(-offset.x, -offset.y, *surface.get_size())
+		# strips only need to cover the screen plus the part of a tile it can start into
+		max_cols = ceil(view.width / TILE_SIZE) + 1
+		max_rows = ceil(view.height / TILE_SIZE) + 1
+		for rect, top_frames, body in self.regions.get(z, ()):
+			visible = rect.clip(view)
+			if not visible:
+				continue
+			cols = int(rect.width // TILE_SIZE)
+			col = int((visible.left - rect.left) // TILE_SIZE)
+			x = rect.left + col * TILE_SIZE
+			width = (cols - col) * TILE_SIZE
+
+			if visible.top < rect.top + TILE_SIZE:
+				top = top_frames[int(self.frame_index % len(top_frames))]
+				strip = self.get_strip(top, min(cols, max_cols), 1)
+				surface.blit(strip, (floor(x + offset.x), floor(rect.top + offset.y)), (0, 0, width, TILE_SIZE))
+
+			rows = int(rect.height // TILE_SIZE) - 1
+			if rows > 0 and visible.bottom > rect.top + TILE_SIZE:
+				row = max(0, int((visible.top - rect.top) // TILE_SIZE) - 1)
+				y = rect.top + (row + 1) * TILE_SIZE
+				strip = self.get_strip(body, min(cols, max_cols), min(rows, max_rows))
+				surface.blit(strip, (floor(x + offset.x), floor(y + offset.y)), (0, 0, width, (rows - row) * TILE_SIZE))
+
+class Bodies:
+	def __init__(self, **columns):
+		# one array per column, typecode None keeps plain python objects
+		self.names = tuple(columns)
+		for name, typecode in columns.items():
+			setattr(self, name, array(typecode) if typecode else [])
+		self.sprites = []
+		self.index = {}
+
+	def __len__(self):
+		return len(self.sprites)
+
+	def add(self, sprite, **values):
+		self.index[sprite] = len(self.sprites)
+		self.sprites.append(sprite)
+		for name in self.names:
+			getattr(self, name).append(values[name])
+
+	def remove(self, sprite):
+		index = self.index.pop(sprite)
+		last = len(self.sprites) - 1
+		for name in self.names:
+			column = getattr(self, name)
+			column[index] = column[last]
+			column.pop()
+		self.sprites[index] = self.sprites[last]
+		self.sprites.pop()
+		if index != last:
+			self.index[self.sprites[index]] = index
+
+class Orbit:
+	def __init__(self, center, speed, start_angle, end_angle):
+		self.center = center
+		self.speed = speed
+		self.start_angle = start_angle
+		self.end_angle = end_angle
+		self.full_circle = end_angle == -1
+		self.angle = start_angle
+		self.direction = 1
+		self.trig = self.previous_trig = (cos(radians(start_angle)), sin(radians(start_angle)))
+		self.members = []
+		self.chains = []
+		self.bounds = pygame.FRect(center, (0, 0))
+		self.shown = False
+
+	def extend_bounds(self, radius, size):
+		self.bounds.union_ip(pygame.FRect(0, 0, radius * 2 + size[0], radius * 2 + size[1]).move_to(center = self.center))
+
+	def add(self, sprite, radius, collidable):
+		self.members.append((sprite, radius, collidable))
+		self.extend_bounds(radius, sprite.rect.size)
+
+	def add_chain(self, surf, radii):
+		self.chains.append((surf, radii))
+		self.extend_bounds(max(radii, default = 0), surf.get_size())
+
+	def draw_chains(self, surface, offset_x, offset_y, alpha):
+		center_x, center_y = self.center
+		previous_x, previous_y = self.previous_trig
+		x, y = self.trig
+		# positions are linear in the radius, so blending the trig blends every link
+		x = previous_x + (x - previous_x) * alpha
+		y = previous_y + (y - previous_y) * alpha
+		for surf, radii in self.chains:
+			left = center_x - surf.get_width() / 2 + offset_x
+			top = center_y - surf.get_height() / 2 + offset_y
+			surface.fblits([(surf, (left + x * radius, top + y * radius)) for radius in radii])
+
+	def remove(self, sprite):
+		self.members = [member for member in self.members if member[0] is not sprite]
+
+class Kinematics(pygame.sprite.Group):
+	def __init__(self, draw_group, margin = TILE_SIZE * 4):
+		super().__init__()
+		self.draw_group = draw_group
+		self.margin = margin
+		# plain struct-of-arrays state, bodies still advance one at a time; the saving comes from sharing trig per orbit
+		# and from not writing rects for decoration that is off screen
+		# world area drawn last frame; decorative bodies outside it skip their rect writes, until the first draw all of them are written
+		self.view = None
+		self.pending = {}
+		self.movers = Bodies(pos = 'f', size = 'f', start = 'f', end = 'f', direction = 'b', speed = 'd', axis = 'b', collidable = 'b', bounds = None)
+		self.orbits = {}
+		self.sprite_orbits = {}
+		self.chain_orbits = {}
+
+	def add_internal(self, sprite, layer = None):
+		super().add_internal(sprite)
+		# motion settings are assigned after the sprite joins its groups, so registration waits for the next update
+		self.pending[sprite] = None
+
+	def remove_internal(self, sprite):
+		super().remove_internal(sprite)
+		if sprite in self.pending:
+			del self.pending[sprite]
+		elif sprite in self.movers.index:
+			self.movers.remove(sprite)
+		else:
+			self.sprite_orbits.pop(sprite).remove(sprite)
+
+	def get_orbit(self, center, speed, start_angle, end_angle):
+		key = (center, speed, start_angle, end_angle)
+		if key not in self.orbits:
+			self.orbits[key] = Orbit(*key)
+		return self.orbits[key]
+
+	def add_chain(self, center, speed, start_angle, end_angle, surf, radii, z):
+		orbit = self.get_orbit(center, speed, start_angle, end_angle)
+		orbit.add_chain(surf, radii)
+		self.chain_orbits.setdefault(z, []).append(orbit)
+		self.draw_group.add_z_layer(z)
+
+	def draw_chains(self, surface, z, view, offset_x, offset_y, alpha):
+		for orbit in self.chain_orbits.get(z, ()):
+			if view.colliderect(orbit.bounds):
+				orbit.draw_chains(surface, offset_x, offset_y, alpha)
+
+	def is_collidable(self, sprite):
+		return any(group is not self and group is not self.draw_group for group in sprite.groups())
+
+	def flush(self):
+		for sprite in self.pending:
+			collidable = self.is_collidable(sprite)
+			if hasattr(sprite, 'radius'):
+				orbit = self.get_orbit(sprite.center, sprite.speed, sprite.start_angle, sprite.end_angle)
+				orbit.add(sprite, sprite.radius, collidable)
+				self.sprite_orbits[sprite] = orbit
+			else:
+				axis = 0 if sprite.move_dir == 'x' else 1
+				size = sprite.rect.size[axis]
+				bounds = pygame.FRect(sprite.start_pos, (0, 0)).union(pygame.FRect(sprite.end_pos, (0, 0))).inflate(sprite.rect.size)
+				self.movers.add(sprite, pos = sprite.rect.topleft[axis], size = size, start = sprite.start_pos[axis], end = sprite.end_pos[axis],
+					direction = int(sprite.direction[axis]), speed = sprite.speed, axis = axis, collidable = collidable, bounds = bounds)
+		self.pending.clear()
+
+	def update_movers(self, dt, view):
+		movers = self.movers
+		positions, sizes, starts, ends = movers.pos, movers.size, movers.start, movers.end
+		directions, speeds, axes = movers.direction, movers.speed, movers.axis
+		for index, sprite in enumerate(movers.sprites):
+			direction = directions[index]
+			positions[index] += direction * speeds[index] * dt
+			pos = positions[index]
+			if direction == 1 and pos + sizes[index] >= ends[index]:
+				direction = -1
+				positions[index] = pos = ends[index] - sizes[index]
+			if direction == -1 and pos <= starts[index]:
+				direction = 1
+				positions[index] = pos = starts[index]
+			directions[index] = direction
+
+			if not movers.collidable[index] and view and not view.colliderect(movers.bounds[index]):
+				continue
+			sprite.old_rect.topleft = sprite.rect.topleft
+			if axes[index] == 0:
+				sprite.rect.x = pos
+				sprite.direction.x = direction
+				sprite.reverse['x'] = direction < 0
+			else:
+				sprite.rect.y = pos
+				sprite.direction.y = direction
+				sprite.reverse['y'] = direction > 0
+			for group in sprite.groups():
+				if hasattr(group, 'relocate'):
+					group.relocate(sprite)
+			if sprite.flip:
+				frames = flip_frames(sprite.frames, sprite.reverse['x'], sprite.reverse['y'])
+				sprite.image = frames[int(sprite.frame_index % len(frames))]
+
+	def update_orbits(self, dt, view):
+		for orbit in self.orbits.values():
+			orbit.angle += orbit.direction * orbit.speed * dt
+			if not orbit.full_circle:
+				if orbit.angle >= orbit.end_angle:
+					orbit.direction = -1
+				if orbit.angle < orbit.start_angle:
+					orbit.direction = 1
+
+			# everything on one hazard shares its angle, so the trig runs once per hazard
+			angle = radians(orbit.angle)
+			orbit.previous_trig = previous_x, previous_y = orbit.trig
+			orbit.trig = x, y = cos(angle), sin(angle)
+			shown = not view or bool(view.colliderect(orbit.bounds))
+			center_x, center_y = orbit.center
+			for sprite, radius, collidable in orbit.members:
+				if collidable or shown:
+					if not collidable and not orbit.shown:
+						sprite.rect.center = (center_x + previous_x * radius, center_y + previous_y * radius)
+						sprite.previous_pos = sprite.rect.topleft
+					sprite.rect.center = (center_x + x * radius, center_y + y * radius)
+			orbit.shown = shown
+
+	def update(self, dt):
+		if self.pending:
+			self.flush()
+		view = self.view.inflate(self.margin * 2, self.margin * 2) if self.view else None
+		self.update_movers(dt, view)
+		self.update_orbits(dt, view)
+
+class Sky:
+	def __init__(self, width, horizon_line, top_limit, clouds, cloud_count = 20, spawn_interval = 2500, margin = 4):
+		self.display_surface = pygame.display.get_surface()
+		self.width = width
+		self.horizon_line = horizon_line
+		self.top_limit = top_limit
+		self.margin = margin
+		self.horizons = {}
+
+		self.large_cloud = clouds['large']
+		self.large_cloud_speed = 50
+		self.large_cloud_x = 0
+		self.large_cloud_tiles = int(self.width / self.large_cloud.get_width()) + 2
+		self.large_cloud_width, self.large_cloud_height = self.large_cloud.get_size()
+		self.large_cloud_strip = None
+
+		# enough slots for the slowest cloud to cross from the spawn point, so spawns are never dropped
+		self.small_clouds = clouds['small']
+		travel = self.width + 600 + max(surf.get_width() for surf in self.small_clouds)
+		capacity = cloud_count + ceil(travel / 50 / (spawn_interval / 1000)) + 1
+		self.cloud_x = array('f', [0] * capacity)
+		self.cloud_previous_x = array('f', [0] * capacity)
+		self.cloud_y = [0] * capacity
+		self.cloud_speed = [0] * capacity
+		self.cloud_surfs = [None] * capacity
+		self.free_clouds = list(range(capacity - 1, -1, -1))
+		self.active_clouds = []
+
+		self.cloud_timer = Timer(spawn_interval, self.spawn_cloud, True)
+		self.cloud_timer.activate()
+		for cloud in range(cloud_count):
+			self.add_cloud((randint(0, self.width), randint(self.top_limit, self.horizon_line)))
+
+	def add_cloud(self, pos):
+		surf = choice(self.small_clouds)
+		speed = randint(50, 120)
+		if self.free_clouds:
+			slot = self.free_clouds.pop()
+			self.cloud_x[slot] = pos[0] - surf.get_width() / 2
+			self.cloud_previous_x[slot] = self.cloud_x[slot]
+			self.cloud_y[slot] = pos[1] - surf.get_height()
+			self.cloud_speed[slot] = speed
+			self.cloud_surfs[slot] = surf
+			self.active_clouds.append(slot)
+
+	def spawn_cloud(self):
+		self.add_cloud((randint(self.width + 500, self.width + 600), randint(self.top_limit, self.horizon_line)))
+
+	def update(self, dt):
+		# spawning runs in the fixed step so it follows the level clock, not the render rate
+		self.cloud_timer.update()
+		xs, previous_xs, speeds, surfs = self.cloud_x, self.cloud_previous_x, self.cloud_speed, self.cloud_surfs
+		expired = []
+		for slot in self.active_clouds:
+			previous_xs[slot] = xs[slot]
+			xs[slot] -= speeds[slot] * dt
+			if xs[slot] + surfs[slot].get_width() <= 0:
+				expired.append(slot)
+		if expired:
+			self.active_clouds = [slot for slot in self.active_clouds if slot not in expired]
+			self.free_clouds.extend(expired)
+
+	def get_horizon(self):
+		# sky above and sea below a horizon line in the middle, cut to the screen by a blit area
+		width, height = size = self.display_surface.get_size()
+		if size not in self.horizons:
+			middle = height + self.margin
+			surf = pygame.Surface((width, middle * 2))
+			surf.fill('#ddc6a1')
+			pygame.draw.rect(surf, '#92a9ce', (0, middle, width, middle))
+			pygame.draw.line(surf, '#f5f1de', (0, middle), (width, middle), 4)
+			self.horizons[size] = surf
+		return self.horizons[size]
+
+	def get_large_cloud_strip(self):
+		width = (ceil(self.display_surface.get_width() / self.large_cloud_width) + 1) * self.large_cloud_width
+		if not self.large_cloud_strip or self.large_cloud_strip.get_width() != width:
+			self.large_cloud_strip = pygame.Surface((width, self.large_cloud_height), pygame.SRCALPHA)
+			self.large_cloud_strip.fblits([(self.large_cloud, (x, 0)) for x in range(0, width, self.large_cloud_width)])
+		return self.large_cloud_strip
+
+	def draw(self, offset, dt):
+		width, height = self.display_surface.get_size()
+
+		horizon_pos = min(max(int(self.horizon_line + offset.y), -self.margin), height + self.margin)
+		self.display_surface.blit(self.get_horizon(), (0, 0), (0, height + self.margin - horizon_pos, width, height))
+
+		self.large_cloud_x -= self.large_cloud_speed * dt
+		if self.large_cloud_x <= -self.large_cloud_width:
+			self.large_cloud_x = 0
+		top = self.horizon_line - self.large_cloud_height + offset.y
+		first = max(0, floor((-offset.x - self.large_cloud_x) / self.large_cloud_width))
+		if first < self.large_cloud_tiles and -self.large_cloud_height < top < height:
+			left = self.large_cloud_x + self.large_cloud_width * first + offset.x
+			area = (0, 0, (self.large_cloud_tiles - first) * self.large_cloud_width, self.large_cloud_height)
+			self.display_surface.blit(self.get_large_cloud_strip(), (floor(left), floor(top)), area)
+
+	def draw_clouds(self, view, offset_x, offset_y, alpha):
+		xs, previous_xs, ys, surfs = self.cloud_x, self.cloud_previous_x, self.cloud_y, self.cloud_surfs
+		blits = []
+		for slot in self.active_clouds:
+			x, y, surf = xs[slot], ys[slot], surfs[slot]
+			if x < view.right and x + surf.get_width() > view.left and y < view.bottom and y + surf.get_height() > view.top:
+				previous_x = previous_xs[slot]
+				blits.append((surf, (previous_x + (x - previous_x) * alpha + offset_x, y + offset_y)))
+		self.display_surface.fblits(blits)
 
 class AllSprites(pygame.sprite.Group):
 	def __init__(self, width, height, clouds, horizon_line, bg_tile = None, top_limit = 0):
 		super().__init__()
 		self.display_surface = pygame.display.get_surface()
 		self.offset = vector()
+		self.z_layers = {}
+		self.z_order = []
+		self.pending = {}
+		# sprites that need their own update; shared animation members only advance their Animation
+		self.updated = {}
 		self.width, self.height = width * TILE_SIZE, height * TILE_SIZE
 		self.borders = {
 			'left': 0,
 			'right': -self.width + WINDOW_WIDTH,
 			'bottom': -self.height + WINDOW_HEIGHT,
 			'top': top_limit}
-		self.sky = not bg_tile
+		self.sky = None
+		self.tile_chunks = TileChunks()
+		self.kinematics = Kinematics(self)
+		self.animations = Animations()
+		self.water = WaterRegions()
 		self.horizon_line = horizon_line
 
+		self.bg_tile = bg_tile
 		if bg_tile:
-			for col in range(width):
-				for row in range(-int(top_limit / TILE_SIZE) - 1, height):
-					x, y = col * TILE_SIZE, row * TILE_SIZE
-					Sprite((x,y), bg_tile, self, -1)
+			top = (-int(top_limit / TILE_SIZE) - 1) * TILE_SIZE
+			self.bg_rect = pygame.FRect(0, top, self.width, self.height - top)
+			self.bg_pattern = None
 		else:
-			self.large_cloud = clouds['large']
-			self.small_clouds = clouds['small']
-			self.cloud_direction = -1
+			self.sky = Sky(self.width, horizon_line, top_limit, clouds)
+			self.add_z_layer(Z_LAYERS['clouds'])
 
-			self.large_cloud_speed = 50
-			self.large_cloud_x = 0
-			self.large_cloud_tiles = int(self.width / self.large_cloud.get_width()) + 2
-			self.large_cloud_width, self.large_cloud_height = self.large_cloud.get_size()
+	def add_internal(self, sprite, layer = None):
+		super().add_internal(sprite)
+		# z is assigned after the sprite joins its groups, so bucketing waits for the next draw
+		self.pending[sprite] = None
+
+	def remove_internal(self, sprite):
+		super().remove_internal(sprite)
+		if sprite in self.pending:
+			del self.pending[sprite]
+		else:
+			del self.z_layers[sprite.z][sprite]
+			self.updated.pop(sprite, None)
+
+	def add_z_layer(self, z):
+		if z not in self.z_layers:
+			self.z_layers[z] = {}
+			self.add_z_order(z)
 
-			self.cloud_timer = Timer(2500, self.create_cloud, True)
-			self.cloud_timer.activate()
-			for cloud in range(20):
-				pos = (randint(0,self.width), randint(self.borders['top'], self.horizon_line))
-				surf = choice(self.small_clouds)
-				Cloud(pos, surf, self)
+	def add_z_order(self, z):
+		# a new z is slotted in once, levels add thousands of tiles but only a handful of layers
+		if z not in self.z_order:
+			insort(self.z_order, z)
+
+	def flush(self):
+		for sprite in self.pending:
+			self.add_z_layer(sprite.z)
+			self.z_layers[sprite.z][sprite] = None
+			sprite.previous_pos = sprite.rect.topleft
+			if sprite not in self.animations:
+				self.updated[sprite] = None
+		self.pending.clear()
+
+	def add_tile(self, pos, surf, z, above_sprites = False):
+		self.tile_chunks.add(pos, surf, z, above_sprites)
+		self.add_z_order(z)
+
+	def add_water(self, rect, top_frames, body, z):
+		self.water.add(rect, top_frames, body, z)
+		self.add_z_layer(z)
 
 	def camera_constraint(self):
 		self.offset.x = self.offset.x if self.offset.x < self.borders['left'] else self.borders['left']
@@ -45,39 +568,71 @@ class AllSprites(pygame.sprite.Group):
 		self.offset.y = self.offset.y if self.offset.y > self.borders['bottom'] else self.borders['bottom']
 		self.offset.y = self.offset.y if self.offset.y < self.borders['top'] else self.borders['top']
 
-	def draw_sky(self):
-		self.display_surface.fill('#ddc6a1')
-		horizon_pos = self.horizon_line + self.offset.y
-
-		sea_rect = pygame.FRect(0,horizon_pos,WINDOW_WIDTH,WINDOW_HEIGHT - horizon_pos)
-		pygame.draw.rect(self.display_surface, '#92a9ce', sea_rect)
+	def update(self, dt):
+		if self.pending:
+			self.flush()
+		self.animations.update(dt)
+		for sprite in tuple(self.updated):
+			sprite.previous_pos = sprite.rect.topleft
+			sprite.update(dt)
+		self.kinematics.update(dt)
+		self.water.update(dt)
+		if self.sky:
+			self.sky.update(dt)
 
-		pygame.draw.line(self.display_surface, '#f5f1de', (0,horizon_pos), (WINDOW_WIDTH, horizon_pos), 4)
+	def get_bg_pattern(self):
+		# one screen of tiles plus a tile of slack, scrolled to the camera instead of rebuilt
+		width, height = self.display_surface.get_size()
+		size = ((ceil(width / TILE_SIZE) + 1) * TILE_SIZE, (ceil(height / TILE_SIZE) + 1) * TILE_SIZE)
+		if not self.bg_pattern or self.bg_pattern.get_size() != size:
+			self.bg_pattern = pygame.Surface(size, pygame.SRCALPHA)
+			self.bg_pattern.fblits([(self.bg_tile, (x, y)) for x in range(0, size[0], TILE_SIZE) for y in range(0, size[1], TILE_SIZE)])
+		return self.bg_pattern
 
-	def draw_large_cloud(self, dt):
-		self.large_cloud_x += self.cloud_direction * self.large_cloud_speed * dt
-		if self.large_cloud_x <= -self.large_cloud_width:
-			self.large_cloud_x = 0
-		for cloud in range(self.large_cloud_tiles):
-			left = self.large_cloud_x + self.large_cloud_width * cloud + self.offset.x
-			top = self.horizon_line - self.large_cloud_height + self.offset.y
-			self.display_surface.blit(self.large_cloud, (left,top))
+	def draw_bg_tile(self):
+		view = pygame.FRect(-self.offset.x, -self.offset.y, *self.display_surface.get_size())
+		visible = self.bg_rect.clip(view)
+		if visible:
+			x = self.bg_rect.left + (visible.left - self.bg_rect.left) // TILE_SIZE * TILE_SIZE
+			y = self.bg_rect.top + (visible.top - self.bg_rect.top) // TILE_SIZE * TILE_SIZE
+			area = (0, 0, self.bg_rect.right - x, self.bg_rect.bottom - y)
+			self.display_surface.blit(self.get_bg_pattern(), (floor(x + self.offset.x), floor(y + self.offset.y)), area)
 
-	def create_cloud(self):
-		pos = (randint(self.width + 500, self.width + 600), randint(self.borders['top'], self.horizon_line))
-		surf = choice(self.small_clouds)
-		Cloud(pos, surf, self)
+	@staticmethod
+	def interpolate(sprite, alpha, offset_x, offset_y):
+		x, y = sprite.rect.topleft
+		previous_x, previous_y = sprite.previous_pos
+		return previous_x + (x - previous_x) * alpha + offset_x, previous_y + (y - previous_y) * alpha + offset_y
 
-	def draw(self, target_pos, dt):
+	def draw(self, target_pos, dt, alpha = 1):
 		self.offset.x = -(target_pos[0] - WINDOW_WIDTH / 2)
 		self.offset.y = -(target_pos[1] - WINDOW_HEIGHT / 2)
 		self.camera_constraint()
 
 		if self.sky:
-			self.cloud_timer.update()
-			self.draw_sky()
-			self.draw_large_cloud(dt)
+			self.sky.draw(self.offset, dt)
+		else:
+			self.draw_bg_tile()
+
+		if self.pending:
+			self.flush()
+		if self.animations.pending:
+			self.animations.flush()
 
-		for sprite in sorted(self, key = lambda sprite: sprite.z):
-			offset_pos = sprite.rect.topleft + self.offset
-			self.display_surface.blit(sprite.image, offset_pos)
\ No newline at end of file
+		offset_x, offset_y = self.offset
+		width, height = self.display_surface.get_size()
+		# sprite images can overhang their rect, so cull with a tile of margin
+		view = pygame.FRect(-offset_x - TILE_SIZE, -offset_y - TILE_SIZE, width + TILE_SIZE * 2, height + TILE_SIZE * 2)
+		self.kinematics.view = view
+		animated = self.animations.spritedict
+		self.tile_chunks.begin_frame((width, height))
+		for z in self.z_order:
+			self.tile_chunks.draw(self.display_surface, self.offset, z)
+			if z in self.z_layers:
+				self.display_surface.fblits([(sprite.animation.image if sprite in animated else sprite.image, self.interpolate(sprite, alpha, offset_x, offset_y))
+					for sprite in self.z_layers[z] if view.colliderect(sprite.rect)])
+			self.tile_chunks.draw(self.display_surface, self.offset, z, True)
+			self.kinematics.draw_chains(self.display_surface, z, view, offset_x, offset_y, alpha)
+			self.water.draw(self.display_surface, self.offset, z)
+			if self.sky and z == Z_LAYERS['clouds']:
+				self.sky.draw_clouds(view, offset_x, offset_y, alpha)
\ No newline at end of file
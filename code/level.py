@@ -1,17 +1,23 @@
 from settings import *
 from sprites import Sprite, MovingSprite, AnimatedSprite, Spike, Item, ParticleEffectSprite
 from player import Player
-from groups import AllSprites
+from groups import AllSprites, SpatialSprites
+from grid import TileGrid, SOLID, SEMI_SOLID
 from enemies import Tooth, Shell, Pearl
+from timer import get_ticks, use_clock
+from support import flip_frames
+from profiler import profiler
 from random import uniform
 import pygame
 
 class Level:
-    def __init__(self, tmx_map, level_frames, audio_files, data, switch_stage, text_system):
+    def __init__(self, tmx_map, level_frames, audio_files, data, switch_stage, text_system, input_source=None, clock=None):
         self.display_surface = pygame.display.get_surface()
         self.data = data
         self.switch_stage = switch_stage
         self.text_system = text_system
+        self.input_source = input_source
+        self.clock = clock
 
         self.level_width = tmx_map.width * TILE_SIZE
         self.level_bottom = tmx_map.height * TILE_SIZE
@@ -22,46 +28,58 @@ class Level:
         else:
             bg_tile = None
 
-        self.all_sprites = AllSprites(
-            width=tmx_map.width,
-            height=tmx_map.height,
-            bg_tile=bg_tile,
-            top_limit=tmx_level_properties['top_limit'],
-            clouds={'large': level_frames['cloud_large'], 'small': level_frames['cloud_small']},
-            horizon_line=tmx_level_properties['horizon_line'])
-        self.collision_sprites = pygame.sprite.Group()
-        self.semi_collision_sprites = pygame.sprite.Group()
-        self.damage_sprites = pygame.sprite.Group()
-        self.tooth_sprites = pygame.sprite.Group()
-        self.pearl_sprites = pygame.sprite.Group()
-        self.item_sprites = pygame.sprite.Group()
-
-        self.setup(tmx_map, level_frames, audio_files)
-
-        self.pearl_surf = level_frames['pearl']
-        self.particle_frames = level_frames['particle']
-
-        self.coin_sound = audio_files['coin']
-        self.coin_sound.set_volume(0.4)
-        self.damage_sound = audio_files['damage']
-        self.damage_sound.set_volume(0.5)
-        self.pearl_sound = audio_files['pearl']
-
-        self.start_time = pygame.time.get_ticks() / 1000
+        # gameplay timers read the level's clock while it is built and run, interface timers keep wall time
+        with use_clock(clock):
+            self.all_sprites = AllSprites(
+                width=tmx_map.width,
+                height=tmx_map.height,
+                bg_tile=bg_tile,
+                top_limit=tmx_level_properties['top_limit'],
+                clouds={'large': level_frames['cloud_large'], 'small': level_frames['cloud_small']},
+                horizon_line=tmx_level_properties['horizon_line'])
+            self.collision_sprites = SpatialSprites()
+            self.semi_collision_sprites = SpatialSprites()
+            self.damage_sprites = pygame.sprite.Group()
+            self.tooth_sprites = pygame.sprite.Group()
+            self.pearl_sprites = pygame.sprite.Group()
+            self.item_sprites = pygame.sprite.Group()
+            self.grid = TileGrid(tmx_map.width, tmx_map.height)
+
+            self.setup(tmx_map, level_frames, audio_files)
+
+            self.pearl_surf = level_frames['pearl']
+            self.particle_frames = level_frames['particle']
+
+            self.coin_sound = audio_files['coin']
+            self.coin_sound.set_volume(0.4)
+            self.damage_sound = audio_files['damage']
+            self.damage_sound.set_volume(0.5)
+            self.pearl_sound = audio_files['pearl']
+
+            self.start_time = get_ticks() / 1000
+            self.accumulator = 0
+            self.running = True
+            self.previous_center = self.player.hitbox_rect.center
 
     def setup(self, tmx_map, level_frames, audio_files):
         # tiles
         for layer in ['BG', 'Terrain', 'FG', 'Platforms']:
             for x, y, surf in tmx_map.get_layer_by_name(layer).tiles():
-                groups = [self.all_sprites]
-                if layer == 'Terrain': groups.append(self.collision_sprites)
-                if layer == 'Platforms': groups.append(self.semi_collision_sprites)
+                groups = []
+                if layer == 'Terrain':
+                    groups.append(self.collision_sprites)
+                    self.grid.set(x, y, SOLID)
+                if layer == 'Platforms':
+                    groups.append(self.semi_collision_sprites)
+                    self.grid.set(x, y, SEMI_SOLID)
                 match layer:
                     case 'BG': z = Z_LAYERS['bg tiles']
                     case 'FG': z = Z_LAYERS['bg tiles']
                     case _: z = Z_LAYERS['main']
 
-                Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, groups, z)
+                self.all_sprites.add_tile((x * TILE_SIZE, y * TILE_SIZE), surf, z)
+                if groups:
+                    Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, groups, z)
 
         for obj in tmx_map.get_layer_by_name('BG details'):
             if obj.name == 'static':
@@ -72,9 +90,9 @@ class Level:
                 if not frames:
                     print(f"Warning: No frames found for {obj.name}")
                     continue  # Skip if frames is empty
-                AnimatedSprite((obj.x, obj.y), frames, self.all_sprites, Z_LAYERS['bg tiles'])
+                AnimatedSprite((obj.x, obj.y), frames, (self.all_sprites, self.all_sprites.animations), Z_LAYERS['bg tiles'])
                 if obj.name == 'candle':
-                    AnimatedSprite((obj.x, obj.y) + vector(-20, -20), level_frames['candle_light'], self.all_sprites, Z_LAYERS['bg tiles'])
+                    AnimatedSprite((obj.x, obj.y) + vector(-20, -20), level_frames['candle_light'], (self.all_sprites, self.all_sprites.animations), Z_LAYERS['bg tiles'])
 
         for obj in tmx_map.get_layer_by_name('Objects'):
             if obj.name == 'player':
@@ -83,19 +101,22 @@ class Level:
                     groups=self.all_sprites,
                     collision_sprites=self.collision_sprites,
                     semi_collision_sprites=self.semi_collision_sprites,
+                    grid=self.grid,
                     frames=level_frames['player'],
                     data=self.data,
                     attack_sound=audio_files['attack'],
-                    jump_sound=audio_files['jump'])
+                    jump_sound=audio_files['jump'],
+                    input_source=self.input_source)
             else:
                 if obj.name in ('barrel', 'crate'):
-                    Sprite((obj.x, obj.y), obj.image, (self.all_sprites, self.collision_sprites))
+                    sprite = Sprite((obj.x, obj.y), obj.image, (self.all_sprites, self.collision_sprites))
+                    self.grid.mark_rect(sprite.rect, SOLID)
                 else:
                     frames = level_frames[obj.name] if not 'palm' in obj.name else level_frames['palms'][obj.name]
                     if obj.name == 'floor_spike' and obj.properties['inverted']:
-                        frames = [pygame.transform.flip(frame, False, True) for frame in frames]
+                        frames = flip_frames(frames, False, True)
 
-                    groups = [self.all_sprites]
+                    groups = [self.all_sprites, self.all_sprites.animations]
                     if obj.name in ('palm_small', 'palm_large'): groups.append(self.semi_collision_sprites)
                     if obj.name in ('saw', 'floor_spike'): groups.append(self.damage_sprites)
 
@@ -104,7 +125,9 @@ class Level:
                     animation_speed = ANIMATION_SPEED if not 'palm' in obj.name else ANIMATION_SPEED + uniform(-1, 1)
                     if not frames:
                         continue
-                    AnimatedSprite((obj.x, obj.y), frames, groups, z, animation_speed)
+                    sprite = AnimatedSprite((obj.x, obj.y), frames, groups, z, animation_speed)
+                    if obj.name in ('palm_small', 'palm_large'):
+                        self.grid.mark_rect(sprite.rect, SEMI_SOLID)
             if obj.name == 'flag':
                 self.level_finish_rect = pygame.FRect((obj.x, obj.y), (obj.width, obj.height))
 
@@ -117,21 +140,19 @@ class Level:
                     speed=obj.properties['speed'],
                     start_angle=obj.properties['start_angle'],
                     end_angle=obj.properties['end_angle'],
-                    groups=(self.all_sprites, self.damage_sprites))
-                for radius in range(0, obj.properties['radius'], 20):
-                    Spike(
-                        pos=(obj.x + obj.width / 2, obj.y + obj.height / 2),
-                        surf=level_frames['spike_chain'],
-                        radius=radius,
-                        speed=obj.properties['speed'],
-                        start_angle=obj.properties['start_angle'],
-                        end_angle=obj.properties['end_angle'],
-                        groups=self.all_sprites,
-                        z=Z_LAYERS['bg details'])
+                    groups=(self.all_sprites, self.all_sprites.kinematics, self.damage_sprites))
+                self.all_sprites.kinematics.add_chain(
+                    center=(obj.x + obj.width / 2, obj.y + obj.height / 2),
+                    speed=obj.properties['speed'],
+                    start_angle=obj.properties['start_angle'],
+                    end_angle=obj.properties['end_angle'],
+                    surf=level_frames['spike_chain'],
+                    radii=range(0, obj.properties['radius'], 20),
+                    z=Z_LAYERS['bg details'])
 
             else:
                 frames = level_frames[obj.name]
-                groups = (self.all_sprites, self.semi_collision_sprites) if obj.properties['platform'] else (self.all_sprites, self.damage_sprites)
+                groups = (self.all_sprites, self.all_sprites.kinematics, self.semi_collision_sprites) if obj.properties['platform'] else (self.all_sprites, self.all_sprites.kinematics, self.damage_sprites)
                 if obj.width > obj.height:
                     move_dir = 'x'
                     start_pos = (obj.x, obj.y + obj.height / 2)
@@ -144,43 +165,39 @@ class Level:
                 MovingSprite(frames, groups, start_pos, end_pos, move_dir, speed, obj.properties['flip'])
 
                 if obj.name == 'saw':
+                    # rails used to be sprites created after the bg detail decor, so they still draw on top of it
                     if move_dir == 'x':
                         y = start_pos[1] - level_frames['saw_chain'].get_height() / 2
                         left, right = int(start_pos[0]), int(end_pos[0])
                         for x in range(left, right, 20):
-                            Sprite((x, y), level_frames['saw_chain'], self.all_sprites, Z_LAYERS['bg details'])
+                            self.all_sprites.add_tile((x, y), level_frames['saw_chain'], Z_LAYERS['bg details'], above_sprites=True)
                     else:
                         x = start_pos[0] - level_frames['saw_chain'].get_width() / 2
                         top, bottom = int(start_pos[1]), int(end_pos[1])
                         for y in range(top, bottom, 20):
-                            Sprite((x, y), level_frames['saw_chain'], self.all_sprites, Z_LAYERS['bg details'])
+                            self.all_sprites.add_tile((x, y), level_frames['saw_chain'], Z_LAYERS['bg details'], above_sprites=True)
 
         for obj in tmx_map.get_layer_by_name('Enemies'):
             if obj.name == 'tooth':
-                Tooth((obj.x, obj.y), level_frames['tooth'], (self.all_sprites, self.damage_sprites, self.tooth_sprites), self.collision_sprites)
+                Tooth((obj.x, obj.y), level_frames['tooth'], (self.all_sprites, self.damage_sprites, self.tooth_sprites), self.grid)
             if obj.name == 'shell':
-                Shell(
+                shell = Shell(
                     pos=(obj.x, obj.y),
                     frames=level_frames['shell'],
                     groups=(self.all_sprites, self.collision_sprites),
                     reverse=obj.properties['reverse'],
                     player=self.player,
                     create_pearl=self.create_pearl)
+                self.grid.mark_rect(shell.rect, SOLID)
 
         for obj in tmx_map.get_layer_by_name('Items'):
-            Item(obj.name, (obj.x + TILE_SIZE / 2, obj.y + TILE_SIZE / 2), level_frames['items'][obj.name], (self.all_sprites, self.item_sprites), self.data)
+            Item(obj.name, (obj.x + TILE_SIZE / 2, obj.y + TILE_SIZE / 2), level_frames['items'][obj.name], (self.all_sprites, self.all_sprites.animations, self.item_sprites), self.data)
 
         for obj in tmx_map.get_layer_by_name('Water'):
             rows = int(obj.height / TILE_SIZE)
             cols = int(obj.width / TILE_SIZE)
-            for row in range(rows):
-                for col in range(cols):
-                    x = obj.x + col * TILE_SIZE
-                    y = obj.y + row * TILE_SIZE
-                    if row == 0:
-                        AnimatedSprite((x, y), level_frames['water_top'], self.all_sprites, Z_LAYERS['water'])
-                    else:
-                        Sprite((x, y), level_frames['water_body'], self.all_sprites, Z_LAYERS['water'])
+            rect = pygame.FRect(obj.x, obj.y, cols * TILE_SIZE, rows * TILE_SIZE)
+            self.all_sprites.add_water(rect, level_frames['water_top'], level_frames['water_body'], Z_LAYERS['water'])
 
     def create_pearl(self, pos, direction):
         Pearl(pos, (self.all_sprites, self.damage_sprites, self.pearl_sprites), self.pearl_surf, direction, 150)
@@ -223,25 +240,42 @@ class Level:
             self.player.hitbox_rect.right = self.level_width
 
         if self.player.hitbox_rect.bottom > self.level_bottom:
+            self.running = False
             self.switch_stage('overworld', -1)
 
         if self.player.hitbox_rect.colliderect(self.level_finish_rect):
-            end_time = pygame.time.get_ticks() / 1000
+            end_time = get_ticks() / 1000
             level_time = end_time - self.start_time
             self.data.add_level_time(level_time, self.data.current_level)
+            self.running = False
             self.switch_stage('overworld', self.level_unlock)
 
+    def update(self, dt):
+        with use_clock(self.clock):
+            if self.clock:
+                self.clock.advance(dt)
+            self.previous_center = self.player.hitbox_rect.center
+            profiler.measure('all_sprites.update', self.all_sprites.update, dt)
+            profiler.measure('pearl_collision', self.pearl_collision)
+            profiler.measure('hit_collision', self.hit_collision)
+            profiler.measure('item_collision', self.item_collision)
+            profiler.measure('attack_collision', self.attack_collision)
+            profiler.measure('check_constraint', self.check_constraint)
+
     def run(self, dt):
         self.display_surface.fill('black')
 
-        self.all_sprites.update(dt)
-        self.pearl_collision()
-        self.hit_collision()
-        self.item_collision()
-        self.attack_collision()
-        self.check_constraint()
-
-        self.all_sprites.draw(self.player.hitbox_rect.center, dt)
+        # physics runs in fixed steps, drawing blends the last two steps by the leftover time
+        self.accumulator = min(self.accumulator + dt, MAX_FRAME_TIME)
+        while self.running and self.accumulator >= FIXED_DT:
+            self.update(FIXED_DT)
+            self.accumulator -= FIXED_DT
+        alpha = self.accumulator / FIXED_DT
+
+        previous_x, previous_y = self.previous_center
+        current_x, current_y = self.player.hitbox_rect.center
+        target_pos = (previous_x + (current_x - previous_x) * alpha, previous_y + (current_y - previous_y) * alpha)
+        profiler.measure('all_sprites.draw', self.all_sprites.draw, target_pos, dt, alpha)
 
         if self.data.current_level == 0:
             if self.data.coins > 0 and not hasattr(self, 'coin_message_shown'):
@@ -0,0 +1,158 @@
+import pickle
+from array import array
+from os import makedirs, replace, stat
+from os.path import join, dirname, basename, exists, normpath, relpath
+from xml.etree import ElementTree
+from pytmx import TiledMap, TiledTileLayer, TiledObjectGroup, TileFlags
+from pytmx.util_pygame import handle_transformation, smart_convert
+import pygame
+
+CACHE_DIR = join(dirname(dirname(__file__)), 'data', 'cache')
+CACHE_VERSION = 1
+
+
+def record_image_loader(filename, colorkey, **kwargs):
+    def load(rect=None, flags=None):
+        return normpath(filename), colorkey, rect, tuple(flags) if flags and any(flags) else None
+    return load
+
+
+def compile_level(tmx_path):
+    tmx_map = TiledMap(tmx_path, image_loader=record_image_loader)
+    folder = dirname(tmx_path)
+
+    images, image_index = [None], {}
+    def add_image(image):
+        if image is None:
+            return 0
+        filename, colorkey, rect, flags = image
+        image = relpath(filename, folder), colorkey, rect, flags
+        if image not in image_index:
+            image_index[image] = len(images)
+            images.append(image)
+        return image_index[image]
+
+    tile_layers, object_layers = {}, {}
+    for layer in tmx_map.layers:
+        if isinstance(layer, TiledTileLayer):
+            indices = [add_image(tmx_map.images[gid]) if gid else 0 for row in layer.data for gid in row]
+            tile_layers[layer.name] = indices
+        elif isinstance(layer, TiledObjectGroup):
+            object_layers[layer.name] = [
+                (obj.name, obj.x, obj.y, obj.width, obj.height, add_image(obj.image), obj.properties)
+                for obj in layer]
+    typecode = 'H' if len(images) < 2 ** 16 else 'I'
+    tile_layers = {name: array(typecode, indices) for name, indices in tile_layers.items()}
+
+    tilesets = [tileset.get('source') for tileset in ElementTree.parse(tmx_path).getroot().iter('tileset')]
+    sources = {basename(tmx_path)} | {normpath(source) for source in tilesets if source} | {image[0] for image in images[1:]}
+    return {
+        'version': CACHE_VERSION,
+        'sources': {source: stat(join(folder, source)).st_mtime_ns for source in sources},
+        'width': tmx_map.width,
+        'height': tmx_map.height,
+        'images': images,
+        'tile_layers': tile_layers,
+        'object_layers': object_layers,
+    }
+
+
+def is_current(level, folder):
+    if level.get('version') != CACHE_VERSION:
+        return False
+    for source, mtime in level['sources'].items():
+        path = join(folder, source)
+        if not exists(path) or stat(path).st_mtime_ns != mtime:
+            return False
+    return True
+
+
+def load_compiled(tmx_path, cache_dir=CACHE_DIR):
+    cache_path = join(cache_dir, basename(tmx_path).split('.')[0] + '.bin')
+    if exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                level = pickle.load(f)
+            if is_current(level, dirname(tmx_path)):
+                return level
+        except (pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+            print(f"Level cache {cache_path} is corrupted: {e}. Recompiling.")
+
+    level = compile_level(tmx_path)
+    makedirs(cache_dir, exist_ok=True)
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(level, f, pickle.HIGHEST_PROTOCOL)
+    replace(temp_path, cache_path)
+    return level
+
+
+def decode_level(tmx_path, cache_dir=CACHE_DIR):
+    # safe on a worker thread: reads the cache and decodes tileset files, nothing here needs the display
+    level = load_compiled(tmx_path, cache_dir)
+    folder = dirname(tmx_path)
+    sheets = {filename: pygame.image.load(join(folder, filename)) for filename, _, _, _ in level['images'][1:]}
+    return level, sheets
+
+
+def load_level(tmx_path, cache_dir=CACHE_DIR):
+    return CompiledMap(*decode_level(tmx_path, cache_dir))
+
+
+class CompiledMap:
+    def __init__(self, level, sheets):
+        self.width, self.height = level['width'], level['height']
+        self.images = self.load_images(level['images'], sheets)
+
+        self.layers = {}
+        for name, indices in level['tile_layers'].items():
+            self.layers[name] = TileLayer(indices, self.width, self.images)
+        for name, objects in level['object_layers'].items():
+            self.layers[name] = [MapObject(name, x, y, width, height, self.images[image], properties)
+                                 for name, x, y, width, height, image, properties in objects]
+
+    @staticmethod
+    def load_images(entries, sheets):
+        # same conversion as pytmx's pygame loader, run on the main thread against already decoded sheets
+        images = [None]
+        for filename, colorkey, rect, flags in entries[1:]:
+            tile = sheets[filename].subsurface(rect) if rect else sheets[filename].copy()
+            if flags:
+                tile = handle_transformation(tile, TileFlags(*flags))
+            images.append(smart_convert(tile, pygame.Color(f'#{colorkey}') if colorkey else None, True))
+        return images
+
+    def get_layer_by_name(self, name):
+        if name not in self.layers:
+            raise ValueError(f'Layer "{name}" not found')
+        return self.layers[name]
+
+
+class TileLayer:
+    def __init__(self, indices, width, images):
+        self.indices = indices
+        self.width = width
+        self.images = images
+
+    def tiles(self):
+        for index, image in enumerate(self.indices):
+            if image:
+                yield index % self.width, index // self.width, self.images[image]
+
+
+class MapObject:
+    def __init__(self, name, x, y, width, height, image, properties):
+        self.name = name
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.image = image
+        self.properties = properties
+
+
+if __name__ == '__main__':
+    from os import listdir
+    levels_dir = join(dirname(dirname(__file__)), 'data', 'levels')
+    for name in sorted(listdir(levels_dir)):
+        if name.endswith('.tmx'):
+            load_compiled(join(levels_dir, name))
+            print(f'Compiled {name}')
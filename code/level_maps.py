@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import listdir
+from os.path import join
+from level_cache import CompiledMap, decode_level, load_level
+
+
+class LevelMaps:
+    def __init__(self, *path, max_loaded=2):
+        folder = join(*path)
+        self.paths = {int(name.split('.')[0]): join(folder, name)
+                      for name in listdir(folder) if name.endswith('.tmx') and name.split('.')[0].isdigit()}
+        self.max_loaded = max_loaded
+        self.maps = OrderedDict()
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def __getitem__(self, level):
+        if level in self.maps:
+            self.maps.move_to_end(level)
+            return self.maps[level]
+
+        if level in self.pending:
+            # the worker only decoded the files, converting to the display format happens here
+            tmx_map = CompiledMap(*self.pending.pop(level).result())
+        else:
+            tmx_map = load_level(self.paths[level])
+        self.maps[level] = tmx_map
+        self.evict()
+        return tmx_map
+
+    def evict(self):
+        while len(self.maps) + len(self.pending) > self.max_loaded:
+            self.maps.popitem(last=False)
+
+    def prefetch(self, level):
+        if level not in self.paths or level in self.maps or level in self.pending:
+            return
+        # prefetched levels count against max_loaded, one slot always stays free for the level being played
+        if self.pending and len(self.pending) >= self.max_loaded - 1:
+            self.pending.pop(next(iter(self.pending))).cancel()
+        if len(self.pending) < self.max_loaded - 1:
+            self.pending[level] = self.executor.submit(decode_level, self.paths[level])
+            self.evict()
@@ -1,46 +1,55 @@
 from level import Level
-from pytmx.util_pygame import load_pygame
+from level_maps import LevelMaps
 from support import *
 from data import Data
+from progress_store import ProgressStore
 from ui import UI
 from overworld import Overworld
 from text import TextSystem
 from settings_manager import SettingsManager
 from settings_menu import SettingsMenu
+from text import get_font
+from retained import RetainedStage
+from pacing import FramePacer
+from profiler import profiler
+from replay import InputRecorder
 
 class Game:
-    def __init__(self):
+    def __init__(self, persist=True, record=False):
         pygame.init()
         self.settings_manager = SettingsManager()
         self.display_surface = pygame.display.get_surface()
         pygame.display.set_caption('Lonely Kitten')
-        self.clock = pygame.time.Clock()
+        self.pacer = FramePacer(self.settings_manager)
         self.import_assets()
 
         self.ui = UI(self.font, self.ui_frames)
-        self.data = Data(self.ui)
-        self.tmx_maps = {
-            0: load_pygame(join('..', 'data', 'levels', '0.tmx')),
-            1: load_pygame(join('..', 'data', 'levels', '1.tmx')),
-            2: load_pygame(join('..', 'data', 'levels', '2.tmx')),
-            3: load_pygame(join('..', 'data', 'levels', '3.tmx')),
-        }
+        self.data = Data(self.ui, ProgressStore() if persist else None)
+        self.tmx_maps = LevelMaps('..', 'data', 'levels')
         self.update_sound_volumes()
         self.bg_music.play(-1)
         self.text_system = TextSystem(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'))
-        self.current_stage = Overworld(self.data, self.font, self.switch_stage, self.text_system)
+        self.profiler_font = get_font(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'), 16)
+        self.current_stage = Overworld(self.data, self.font, self.switch_stage, self.text_system, self.tmx_maps.prefetch)
+        self.overlay_rects = []
+        self.record = record
+        self.recorder = None
 
     def switch_stage(self, target, unlock=0):
         self.text_system.clear()
+        self.finish_recording()
         if target == 'level':
-            font = pygame.font.Font(join('..', 'graphics', 'ui', 'runescape_uf.ttf'), 40)
+            if self.record:
+                self.recorder = InputRecorder(self.data.current_level)
             level = Level(
                 self.tmx_maps[self.data.current_level],
                 self.level_frames,
                 self.audio_files,
                 self.data,
                 self.switch_stage,
-                self.text_system
+                self.text_system,
+                input_source=self.recorder,
+                clock=self.recorder.clock if self.recorder else None
             )
             self.current_stage = level
             if self.data.current_level == 0:
@@ -50,11 +59,11 @@ class Game:
                 self.text_system.add_message("Собирай монеты, избегай врагов и ищи флаг для завершения уровня", 3000)
                 self.text_system.add_message("Сердечки - это твои жизни. Будь осторожен!", 2000)
         elif target == 'settings':
-            font = pygame.font.Font(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'), 40)
+            font = get_font(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'), 40)
             self.current_stage = SettingsMenu(font, self.switch_stage, self.settings_manager, self,
                                               self.update_sound_volumes)
         else:
-            font = pygame.font.Font(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'), 40)
+            font = get_font(join('..', 'graphics', 'ui', 'Roboto-Regular.ttf'), 40)
             self.text_system.add_message("Нажимай Enter для выбора уровня!", 1000)
             if unlock > 0:
                 self.data.unlocked_level = max(self.data.unlocked_level, unlock)
@@ -63,10 +72,37 @@ class Game:
                     return
             else:
                 self.data.health -= 1
-            self.current_stage = Overworld(self.data, font, self.switch_stage, self.text_system)
+            self.current_stage = Overworld(self.data, font, self.switch_stage, self.text_system, self.tmx_maps.prefetch)
         self.update_sound_volumes()
 
+    def finish_recording(self):
+        if self.recorder:
+            print(f"Replay saved to {self.recorder.save()}")
+            self.recorder = None
+
+    def draw_loading(self, done, total):
+        pygame.event.pump()
+        width, height = self.display_surface.get_size()
+        bar_rect = pygame.FRect(0, 0, width / 2, 24)
+        bar_rect.center = (width / 2, height / 2)
+        fill_rect = bar_rect.inflate(-8, -8)
+        fill_rect.width *= done / total
+
+        self.display_surface.fill('#33323d')
+        pygame.draw.rect(self.display_surface, '#ddc6a1', bar_rect, 2)
+        pygame.draw.rect(self.display_surface, '#f5f1de', fill_rect)
+        pygame.display.update()
+
     def import_assets(self):
+        preload_folders([
+            ('..', 'graphics', 'level'),
+            ('..', 'graphics', 'enemies'),
+            ('..', 'graphics', 'player'),
+            ('..', 'graphics', 'objects', 'boat'),
+            ('..', 'graphics', 'items'),
+            ('..', 'graphics', 'effects'),
+            ('..', 'graphics', 'ui'),
+        ], self.draw_loading)
         self.level_frames = {
             'flag': import_folder('..', 'graphics', 'level', 'flag'),
             'saw': import_folder('..', 'graphics', 'enemies', 'saw', 'animation'),
@@ -78,7 +114,6 @@ class Game:
             'small_chain': import_folder('..', 'graphics', 'level', 'small_chains'),
             'candle_light': import_folder('..', 'graphics', 'level', 'candle light'),
             'player': import_sub_folders('..', 'graphics', 'player'),
-            'saw': import_folder('..', 'graphics', 'enemies', 'saw', 'animation'),
             'saw_chain': import_image('..', 'graphics', 'enemies', 'saw', 'saw_chain'),
             'helicopter': import_folder('..', 'graphics', 'level', 'helicopter'),
             'boat': import_folder('..', 'graphics', 'objects', 'boat'),
@@ -95,13 +130,18 @@ class Game:
             'cloud_small': import_folder('..', 'graphics', 'level', 'clouds', 'small'),
             'cloud_large': import_image('..', 'graphics', 'level', 'clouds', 'large_cloud'),
         }
-        self.font = pygame.font.Font(join('..', 'graphics', 'ui', 'runescape_uf.ttf'), 40)
+        self.level_frames = build_atlas(self.level_frames)
+        self.font = get_font(join('..', 'graphics', 'ui', 'runescape_uf.ttf'), 40)
         self.ui_frames = {
             'heart': import_folder('..', 'graphics', 'ui', 'heart', 'full'),
             'coin': import_image('..', 'graphics', 'ui', 'coin'),
             'heart_empty': import_folder('..', 'graphics', 'ui', 'heart', 'empty'),
             'heart_bonus': import_folder('..', 'graphics', 'ui', 'heart', 'bonus')
         }
+        self.ui_frames = build_atlas(self.ui_frames)
+        # the atlas pages now hold every frame, drop the per-file surfaces so they can be freed
+        decoded_images.clear()
+        loaded_images.clear()
         self.audio_files = {
             'coin': pygame.mixer.Sound(join('..', 'audio', 'coin.wav')),
             'attack': pygame.mixer.Sound(join('..', 'audio', 'attack.wav')),
@@ -134,12 +174,12 @@ class Game:
 
         waiting = True
         while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    waiting = False
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                waiting = False
 
         self.data.reset()
         self.switch_stage('overworld')
@@ -175,33 +215,57 @@ class Game:
         self.display_surface.blit(restart_text, rs_rect)
         pygame.display.update()
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    pygame.quit()
-                    sys.exit()
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                pygame.quit()
+                sys.exit()
 
     def run(self):
         while True:
-            dt = self.clock.tick() / 1000
+            dt = self.pacer.tick(isinstance(self.current_stage, RetainedStage))
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.finish_recording()
                     pygame.quit()
                     sys.exit()
+                self.pacer.handle_event(event)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and profiler.enabled:
+                    path = profiler.export()
+                    self.text_system.add_message(f"Профиль сохранён: {path}.json/.csv", 2000)
                 if hasattr(self.current_stage, 'handle_event'):
                     self.current_stage.handle_event(event)
 
+            profiler.start('frame')
             self.text_system.update()
-            self.current_stage.run(dt)
-            self.ui.update(dt)
-            self.text_system.draw(self.display_surface)
+            stage = self.current_stage
+            dirty_rects = stage.run(dt)
+            # retained stages only hand back what changed, so repaint under last frame's overlays
+            if dirty_rects is not None and self.current_stage is stage:
+                stage.restore(self.overlay_rects)
+                dirty_rects = dirty_rects + self.overlay_rects
+            else:
+                dirty_rects = None
+            self.overlay_rects = profiler.measure('ui.update', self.ui.update, dt)
+            self.overlay_rects += profiler.measure('text_system.draw', self.text_system.draw, self.display_surface)
+            self.overlay_rects += profiler.draw(self.display_surface, self.profiler_font)
             self.check_game_over()
-            pygame.display.update()
+            with profiler.section('display.update'):
+                if dirty_rects is None:
+                    pygame.display.update()
+                elif dirty_rects or self.overlay_rects:
+                    pygame.display.update(dirty_rects + self.overlay_rects)
+            profiler.stop('frame')
+            profiler.end_frame()
 
 if __name__ == '__main__':
-    game = Game()
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Lonely Kitten')
+    parser.add_argument('--record', action='store_true', help='save a replay of every level attempt to data/replays')
+    args = parser.parse_args()
+
+    game = Game(record=args.record)
     game.run()
\ No newline at end of file
@@ -1,11 +1,14 @@
 from settings import *
+from text import text_cache
+from retained import RetainedStage
 
-class Overworld:
-    def __init__(self, data, font, switch_stage, text_system):
-        self.display_surface = pygame.display.get_surface()
+class Overworld(RetainedStage):
+    def __init__(self, data, font, switch_stage, text_system, prefetch_level=None):
+        super().__init__()
         self.data = data
         self.switch_stage = switch_stage
         self.text_system = text_system
+        self.prefetch_level = prefetch_level
 
         self.font = font
         self.num_levels = 4
@@ -16,6 +19,8 @@ class Overworld:
         self.search_input = ""
         self.search_active = False
         self.show_fastest = False
+        # runs persist across sessions, so only the fastest few are listed and the label stays one screen wide
+        self.shown_times = 4
 
         self.colors = {
             'highlight': '#f5f1de',
@@ -23,8 +28,14 @@ class Overworld:
             'locked': '#a09384',
             'strikethrough': '#c2474b'
         }
+        self.prefetch_selection()
+
+    def prefetch_selection(self):
+        if self.prefetch_level and self.selection_index < self.num_levels and self.selection_index <= self.data.unlocked_level:
+            self.prefetch_level(self.selection_index)
 
     def handle_event(self, event):
+        super().handle_event(event)
         if event.type == pygame.KEYDOWN:
             current_time = pygame.time.get_ticks()
             if self.search_active:
@@ -41,9 +52,11 @@ class Overworld:
                 if event.key == pygame.K_DOWN:
                     self.selection_index = (self.selection_index + 1) % self.num_options
                     self.last_selection_time = current_time
+                    self.prefetch_selection()
                 elif event.key == pygame.K_UP:
                     self.selection_index = (self.selection_index - 1 + self.num_options) % self.num_options
                     self.last_selection_time = current_time
+                    self.prefetch_selection()
                 elif event.key == pygame.K_RETURN:
                     if self.selection_index < self.num_levels:
                         if self.selection_index <= self.data.unlocked_level:
@@ -75,7 +88,7 @@ class Overworld:
     def draw(self):
         self.display_surface.fill('#92a9ce')
 
-        title_surf = self.font.render('SELECT LEVEL', True, self.colors['highlight'])
+        title_surf = text_cache.render(self.font, 'SELECT LEVEL', self.colors['highlight'])
         title_rect = title_surf.get_frect(center=(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 4))
         self.display_surface.blit(title_surf, title_rect)
 
@@ -95,7 +108,7 @@ class Overworld:
             else:
                 color = self.colors['available']
 
-            item_surf = self.font.render(text, True, color)
+            item_surf = text_cache.render(self.font, text, color)
             item_rect = item_surf.get_frect(center=(WINDOW_WIDTH / 2, start_y + i * item_height))
             self.display_surface.blit(item_surf, item_rect)
 
@@ -107,31 +120,31 @@ class Overworld:
         settings_text = "Settings"
         is_selected = self.selection_index == self.num_levels
         color = self.colors['highlight'] if is_selected else self.colors['available']
-        settings_surf = self.font.render(settings_text, True, color)
+        settings_surf = text_cache.render(self.font, settings_text, color)
         settings_rect = settings_surf.get_frect(center=(WINDOW_WIDTH / 2, start_y + self.num_levels * item_height))
         self.display_surface.blit(settings_surf, settings_rect)
 
         times_text = "Level Times"
         is_selected = self.selection_index == self.num_levels + 1
         color = self.colors['highlight'] if is_selected else self.colors['available']
-        times_surf = self.font.render(times_text, True, color)
+        times_surf = text_cache.render(self.font, times_text, color)
         times_rect = times_surf.get_frect(center=(WINDOW_WIDTH / 2, start_y + (self.num_levels + 1) * item_height))
         self.display_surface.blit(times_surf, times_rect)
 
         if self.data.level_times:
-            self.data.sort_level_times()
             if self.show_fastest:
                 fastest_time, level = self.data.get_fastest_time()
                 times_text = f"Fastest Time: {fastest_time:.2f}s (Level {level + 1})"
             else:
-                times_text = f"Sorted Times: {', '.join(f'L{level + 1}: {time:.2f}s' for time, level in self.data.level_times)}"
-            times_surf = self.font.render(times_text, True, self.colors['available'])
+                fastest = self.data.level_times.fastest(self.shown_times)
+                times_text = f"Sorted Times ({len(fastest)} of {len(self.data.level_times)}): {', '.join(f'L{level + 1}: {time:.2f}s' for time, level in fastest)}"
+            times_surf = text_cache.render(self.font, times_text, self.colors['available'])
             times_rect = times_surf.get_frect(center=(WINDOW_WIDTH / 2, start_y + (self.num_levels + 2) * item_height))
             self.display_surface.blit(times_surf, times_rect)
 
         if self.search_active:
             search_text = f"Enter time to search (seconds): {self.search_input}"
-            search_surf = self.font.render(search_text, True, self.colors['highlight'])
+            search_surf = text_cache.render(self.font, search_text, self.colors['highlight'])
             search_rect = search_surf.get_frect(center=(WINDOW_WIDTH / 2, start_y + (self.num_levels + 3) * item_height))
             self.display_surface.blit(search_surf, search_rect)
 
@@ -144,7 +157,4 @@ class Overworld:
             self.text_system.add_message("Управление: Стрелки/WASD - движение, Пробел - прыжок", 3000)
             self.text_system.add_message("Собирай монеты, избегай врагов и ищи флаг для завершения уровня", 3000)
             self.text_system.add_message("Сердечки - это твои жизни. Будь осторожен!", 2000)
-            self.intro_shown = True
-
-    def run(self, dt):
-        self.draw()
\ No newline at end of file
+            self.intro_shown = True
\ No newline at end of file
@@ -0,0 +1,43 @@
+from settings import *
+
+
+class FramePacer:
+    def __init__(self, settings_manager, idle_fps=10, poll_interval=5):
+        self.settings_manager = settings_manager
+        self.clock = pygame.time.Clock()
+        self.idle_fps = idle_fps
+        self.poll_interval = poll_interval
+        self.focused = True
+
+    def handle_event(self, event):
+        if event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+            self.focused = False
+        elif event.type in (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED):
+            self.focused = True
+
+    def target_fps(self):
+        # not real vsync: the frame rate is capped at the monitor refresh rate, swaps are not synchronised
+        if self.settings_manager.vsync:
+            return pygame.display.get_current_refresh_rate() or 60
+        return self.settings_manager.target_fps
+
+    def wait_for_event(self, timeout):
+        # sleep in short slices until input is queued; peeking leaves it in the queue for the main loop
+        end = pygame.time.get_ticks() + timeout
+        while pygame.time.get_ticks() < end:
+            if pygame.event.peek():
+                return True
+            pygame.time.wait(self.poll_interval)
+        return False
+
+    def tick(self, static_screen=False):
+        if self.settings_manager.power_saving and not self.focused:
+            # a game in the background is paused: it idles and reports no elapsed time
+            self.wait_for_event(int(1000 / self.idle_fps))
+            self.clock.tick()
+            return 0
+        if self.settings_manager.power_saving and static_screen:
+            if self.wait_for_event(int(1000 / self.idle_fps)):
+                return self.clock.tick() / 1000
+            return self.clock.tick(self.idle_fps) / 1000
+        return self.clock.tick(self.target_fps()) / 1000
@@ -1,15 +1,17 @@
 from settings import *
-from timer import Timer
+from support import flip_frames, silhouette
+from timer import Timer, get_ticks
 from math import sin
 
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, groups, collision_sprites, semi_collision_sprites, frames, data, attack_sound, jump_sound):
+    def __init__(self, pos, groups, collision_sprites, semi_collision_sprites, grid, frames, data, attack_sound, jump_sound, input_source=None):
         super().__init__(groups)
         self.z = Z_LAYERS['main']
         self.data = data
 
         self.frames, self.frame_index = frames, 0
+        self.flipped_frames = flip_frames(frames)
         self.state, self.facing_right = 'idle', True
         self.image = self.frames[self.state][self.frame_index]
 
@@ -26,6 +28,7 @@ class Player(pygame.sprite.Sprite):
 
         self.collision_sprites = collision_sprites
         self.semi_collision_sprites = semi_collision_sprites
+        self.grid = grid
         self.on_surface = {'floor': False, 'left': False, 'right': False}
         self.platform = None
 
@@ -39,9 +42,10 @@ class Player(pygame.sprite.Sprite):
 
         self.attack_sound = attack_sound
         self.jump_sound = jump_sound
+        self.input_source = input_source or pygame.key.get_pressed
 
     def input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source()
         input_vector = vector(0, 0)
         if not self.timers['wall jump'].active:
 
@@ -111,8 +115,11 @@ class Player(pygame.sprite.Sprite):
                                  (2, self.hitbox_rect.height / 2))
         left_rect = pygame.Rect(self.hitbox_rect.topleft + vector(-2, self.hitbox_rect.height / 4),
                                 (2, self.hitbox_rect.height / 2))
-        collide_rects = [sprite.rect for sprite in self.collision_sprites]
-        semi_collide_rect = [sprite.rect for sprite in self.semi_collision_sprites]
+        contact_area = self.hitbox_rect.inflate(4, 4)
+        nearby_sprites = self.collision_sprites.query(contact_area) if self.grid.in_rect(contact_area) else []
+        nearby_semi_sprites = self.semi_collision_sprites.query(contact_area)
+        collide_rects = [sprite.rect for sprite in nearby_sprites]
+        semi_collide_rect = [sprite.rect for sprite in nearby_semi_sprites]
 
         self.on_surface['floor'] = True if floor_rect.collidelist(collide_rects) >= 0 or floor_rect.collidelist(
             semi_collide_rect) >= 0 and self.direction.y >= 0 else False
@@ -120,13 +127,13 @@ class Player(pygame.sprite.Sprite):
         self.on_surface['left'] = True if left_rect.collidelist(collide_rects) >= 0 else False
 
         self.platform = None
-        sprites = self.collision_sprites.sprites() + self.semi_collision_sprites.sprites()
+        sprites = nearby_sprites + nearby_semi_sprites
         for sprite in [sprite for sprite in sprites if hasattr(sprite, 'moving')]:
             if sprite.rect.colliderect(floor_rect):
                 self.platform = sprite
 
     def collision(self, axis):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_sprites.query(self.hitbox_rect.union(self.old_rect)):
             if sprite.rect.colliderect(self.hitbox_rect):
                 if axis == 'horizontal':
                     # left
@@ -151,7 +158,7 @@ class Player(pygame.sprite.Sprite):
 
     def semi_collision(self):
         if not self.timers['platform skip'].active:
-            for sprite in self.semi_collision_sprites:
+            for sprite in self.semi_collision_sprites.query(self.hitbox_rect.union(self.old_rect)):
                 if sprite.rect.colliderect(self.hitbox_rect):
                     if self.hitbox_rect.bottom >= sprite.rect.top and int(self.old_rect.bottom) <= sprite.old_rect.top:
                         self.hitbox_rect.bottom = sprite.rect.top
@@ -164,8 +171,8 @@ class Player(pygame.sprite.Sprite):
 
     def animate(self, dt):
         self.frame_index += ANIMATION_SPEED * dt
-        self.image = self.frames[self.state][int(self.frame_index % len(self.frames[self.state]))]
-        self.image = self.image if self.facing_right else pygame.transform.flip(self.image, True, False)
+        frames = self.frames if self.facing_right else self.flipped_frames
+        self.image = frames[self.state][int(self.frame_index % len(frames[self.state]))]
 
         if self.attacking and self.frame_index > len(self.frames[self.state]):
             self.attacking = False
@@ -188,11 +195,8 @@ class Player(pygame.sprite.Sprite):
             self.timers['hit'].activate()
 
     def flicker(self):
-        if self.timers['hit'].active and sin(pygame.time.get_ticks() * 100) >= 0:
-            white_mask = pygame.mask.from_surface(self.image)
-            white_surf = white_mask.to_surface()
-            white_surf.set_colorkey('black')
-            self.image = white_surf
+        if self.timers['hit'].active and sin(get_ticks() * 100) >= 0:
+            self.image = silhouette(self.image)
 
     def update(self, dt):
         self.old_rect = self.hitbox_rect.copy()
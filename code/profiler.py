@@ -0,0 +1,119 @@
+import csv
+import json
+import pygame
+from collections import deque
+from contextlib import contextmanager
+from os import makedirs
+from os.path import join, dirname
+from time import perf_counter, strftime
+
+PROFILE_DIR = join(dirname(dirname(__file__)), 'data', 'profiles')
+
+
+class FrameProfiler:
+    def __init__(self, window=240, refresh_frames=30):
+        self.enabled = False
+        self.window = window
+        self.refresh_frames = refresh_frames
+        self.starts = {}
+        self.frame_times = {}
+        self.samples = {}
+        self.frames = 0
+        self.overlay = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.starts.clear()
+        self.frame_times.clear()
+        self.samples.clear()
+        self.frames = 0
+        self.overlay = None
+
+    def start(self, name):
+        if self.enabled:
+            self.starts[name] = perf_counter()
+
+    def stop(self, name):
+        if self.enabled and name in self.starts:
+            # sections that run several times a frame, like fixed physics steps, are summed
+            self.frame_times[name] = self.frame_times.get(name, 0) + perf_counter() - self.starts.pop(name)
+
+    @contextmanager
+    def section(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def measure(self, name, func, *args):
+        # disabled hooks are a plain call, no context manager is built
+        if not self.enabled:
+            return func(*args)
+        with self.section(name):
+            return func(*args)
+
+    def end_frame(self):
+        if self.enabled:
+            for name, seconds in self.frame_times.items():
+                self.samples.setdefault(name, deque(maxlen=self.window)).append(seconds * 1000)
+            self.frame_times.clear()
+            self.frames += 1
+
+    @staticmethod
+    def percentile(values, percent):
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+    def stats(self):
+        stats = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            stats[name] = {
+                'avg_ms': sum(values) / len(values),
+                'p95_ms': self.percentile(values, 95),
+                'p99_ms': self.percentile(values, 99),
+                'max_ms': values[-1],
+                'samples': len(values),
+            }
+        return stats
+
+    def export(self, folder=PROFILE_DIR):
+        makedirs(folder, exist_ok=True)
+        stats = self.stats()
+        path = join(folder, f"profile-{strftime('%Y%m%d-%H%M%S')}")
+        with open(path + '.json', 'w') as f:
+            json.dump(stats, f, indent=4)
+        with open(path + '.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['section', 'avg_ms', 'p95_ms', 'p99_ms', 'max_ms', 'samples'])
+            for name, values in stats.items():
+                writer.writerow([name, *(round(values[key], 3) for key in ('avg_ms', 'p95_ms', 'p99_ms', 'max_ms')), values['samples']])
+        return path
+
+    def render_overlay(self, font):
+        lines = [f"{'section':<20}{'avg':>8}{'p95':>8}{'p99':>8}"]
+        for name, values in self.stats().items():
+            lines.append(f"{name:<20}{values['avg_ms']:>8.2f}{values['p95_ms']:>8.2f}{values['p99_ms']:>8.2f}")
+        line_surfs = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(surf.get_width() for surf in line_surfs) + 20
+        height = sum(surf.get_height() for surf in line_surfs) + 20
+
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        y = 10
+        for surf in line_surfs:
+            overlay.blit(surf, (10, y))
+            y += surf.get_height()
+        return overlay
+
+    def draw(self, surface, font):
+        if not self.enabled:
+            return []
+        if self.overlay is None or self.frames % self.refresh_frames == 0:
+            self.overlay = self.render_overlay(font)
+        rect = self.overlay.get_rect(topright=(surface.get_width() - 10, 10))
+        surface.blit(self.overlay, rect)
+        return [rect]
+
+
+profiler = FrameProfiler()
@@ -0,0 +1,103 @@
+import atexit
+import sqlite3
+from os import makedirs
+from os.path import join, dirname
+from queue import Queue, Empty
+from threading import Thread
+from time import time
+
+PROGRESS_DIR = join(dirname(dirname(__file__)), 'data')
+PROGRESS_FILE = join(PROGRESS_DIR, 'progress.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS progress (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, level INTEGER NOT NULL, time REAL NOT NULL, recorded REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (time, id);
+CREATE INDEX IF NOT EXISTS runs_by_level ON runs (level, time);
+'''
+
+
+class ProgressStore:
+    def __init__(self, path=PROGRESS_FILE):
+        self.path = path
+        makedirs(dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+
+        self.queue = Queue()
+        self.error = None
+        self.error_reported = False
+        self.writer = Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def load(self):
+        connection = self.connect()
+        progress = dict(connection.execute('SELECT key, value FROM progress'))
+        runs = connection.execute('SELECT time, level FROM runs ORDER BY time, id').fetchall()
+        connection.close()
+        return progress, runs
+
+    def report_error(self):
+        # saves happen mid-game (coin pickups), so a failed write is only printed here and raised on close
+        if self.error and not self.error_reported:
+            print(f"Saving progress to {self.path} failed: {self.error}")
+            self.error_reported = True
+
+    def save_progress(self, **values):
+        self.queue.put(('progress', values))
+        self.report_error()
+
+    def record_run(self, time_taken, level):
+        self.queue.put(('run', (level, time_taken, time())))
+        self.report_error()
+
+    def write_loop(self):
+        try:
+            connection = self.connect()
+        except Exception as error:
+            self.error = error
+            self.error_reported = False
+            return
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            # everything queued since the last commit goes in one transaction, only the newest progress is kept
+            progress = {}
+            runs = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif item[0] == 'progress':
+                    progress.update(item[1])
+                else:
+                    runs.append(item[1])
+            try:
+                with connection:
+                    connection.executemany('INSERT OR REPLACE INTO progress (key, value) VALUES (?, ?)', progress.items())
+                    connection.executemany('INSERT INTO runs (level, time, recorded) VALUES (?, ?, ?)', runs)
+            except Exception as error:
+                self.error = error
+                self.error_reported = False
+        connection.close()
+
+    def close(self):
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+        if self.error:
+            error, self.error = self.error, None
+            raise RuntimeError(f'Saving progress to {self.path} failed') from error
@@ -0,0 +1,118 @@
+from settings import *
+from simulation import SimulationClock, Simulation
+from os import makedirs
+from os.path import join, dirname
+from time import strftime
+import random
+import struct
+import zlib
+
+REPLAY_DIR = join(dirname(dirname(__file__)), 'data', 'replays')
+REPLAY_MAGIC = b'LKRP'
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct('<4sBBId')
+# every key Player.input reads, one bit each
+REPLAY_KEYS = (
+	pygame.K_RIGHT, pygame.K_d, pygame.K_LEFT, pygame.K_a, pygame.K_DOWN,
+	pygame.K_s, pygame.K_x, pygame.K_SPACE, pygame.K_w, pygame.K_UP)
+
+def write_varint(out, value):
+	while value >= 0x80:
+		out.append(value & 0x7f | 0x80)
+		value >>= 7
+	out.append(value)
+
+def read_varint(data, index):
+	value = shift = 0
+	while True:
+		byte = data[index]
+		index += 1
+		value |= (byte & 0x7f) << shift
+		if byte < 0x80:
+			return value, index
+		shift += 7
+
+def save_replay(path, level, seed, runs, dt = FIXED_DT):
+	# body is (key mask, repeat count) pairs as varints, one count per fixed step
+	body = bytearray()
+	for mask, count in runs:
+		write_varint(body, mask)
+		write_varint(body, count)
+	with open(path, 'wb') as f:
+		f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, level, seed, dt))
+		f.write(zlib.compress(bytes(body), 9))
+
+def load_replay(path):
+	with open(path, 'rb') as f:
+		data = f.read()
+	magic, version, level, seed, dt = REPLAY_HEADER.unpack_from(data)
+	if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+		raise ValueError(f'{path} is not a version {REPLAY_VERSION} replay')
+
+	body = zlib.decompress(data[REPLAY_HEADER.size:])
+	runs = []
+	index = 0
+	while index < len(body):
+		mask, index = read_varint(body, index)
+		count, index = read_varint(body, index)
+		runs.append((mask, count))
+	return level, seed, dt, runs
+
+def mask_keys(mask):
+	return [key for bit, key in enumerate(REPLAY_KEYS) if mask >> bit & 1]
+
+class InputRecorder:
+	def __init__(self, level, source = None, seed = None):
+		self.level = level
+		self.source = source or pygame.key.get_pressed
+		self.seed = random.randrange(2 ** 32) if seed is None else seed
+		self.clock = SimulationClock()
+		self.runs = []
+
+		# the level is built right after this, and the only dice rolled while it runs are cloud spawns inside the
+		# fixed step on the level clock, so one seed up front reproduces the whole run
+		random.seed(self.seed)
+
+	def __call__(self):
+		keys = self.source()
+		mask = 0
+		for bit, key in enumerate(REPLAY_KEYS):
+			if keys[key]:
+				mask |= 1 << bit
+		if self.runs and self.runs[-1][0] == mask:
+			self.runs[-1][1] += 1
+		else:
+			self.runs.append([mask, 1])
+		return keys
+
+	def save(self, folder = REPLAY_DIR):
+		makedirs(folder, exist_ok = True)
+		path = join(folder, f"level{self.level + 1}-{strftime('%Y%m%d-%H%M%S')}-{self.seed:08x}.lkr")
+		save_replay(path, self.level, self.seed, self.runs)
+		return path
+
+def replay(game, path, render = False):
+	level, seed, dt, runs = load_replay(path)
+	steps = sum(count for mask, count in runs)
+	simulation = Simulation(game, level, seed, dt, [(count, mask_keys(mask)) for mask, count in runs], render)
+	return simulation, simulation.run(steps), steps
+
+if __name__ == '__main__':
+	import os
+	from argparse import ArgumentParser
+	from time import perf_counter
+
+	parser = ArgumentParser(description = 'Replay a recorded level run headless')
+	parser.add_argument('path')
+	parser.add_argument('--render', action = 'store_true')
+	args = parser.parse_args()
+
+	os.environ['SDL_VIDEODRIVER'] = 'dummy'
+	os.environ['SDL_AUDIODRIVER'] = 'dummy'
+	from main import Game
+
+	game = Game(persist = False)
+	start = perf_counter()
+	simulation, frames, steps = replay(game, args.path, args.render)
+	elapsed = perf_counter() - start
+	print(f'{frames}/{steps} steps in {elapsed:.2f}s ({frames * simulation.dt / elapsed:.0f}x real time), result: {simulation.result or "running"}')
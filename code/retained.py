@@ -0,0 +1,24 @@
+from settings import *
+
+
+class RetainedStage:
+    def __init__(self):
+        self.display_surface = pygame.display.get_surface()
+        self.background = None
+        self.dirty = True
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            self.dirty = True
+
+    def restore(self, rects):
+        for rect in rects:
+            self.display_surface.blit(self.background, rect, rect)
+
+    def run(self, dt):
+        if self.dirty or self.background is None or self.background.get_size() != self.display_surface.get_size():
+            self.draw()
+            self.background = self.display_surface.copy()
+            self.dirty = False
+            return [self.display_surface.get_rect()]
+        return []
@@ -4,6 +4,8 @@ from pygame.math import Vector2 as vector
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
 TILE_SIZE = 64
 ANIMATION_SPEED = 6
+FIXED_DT = 1 / 120
+MAX_FRAME_TIME = 0.25
 
 Z_LAYERS = {
 	'bg': 0,
@@ -12,9 +12,13 @@ class SettingsManager:
             'resolution': (1280, 720),
             'music_on': True,
             'volume_music': 0.5,
-            'volume_sfx': 0.7
+            'volume_sfx': 0.7,
+            'target_fps': 60,
+            'vsync': False,
+            'power_saving': True
         }
         self.resolutions = [(800, 600), (1024, 768), (1280, 720), (1920, 1080)]
+        self.frame_rates = [30, 60, 120, 144, 0]
 
         self.settings = self.default_settings.copy()
         self.load_settings()
@@ -34,6 +38,9 @@ class SettingsManager:
                 if self.settings['resolution'] not in self.resolutions:
                     print(f"Invalid resolution {self.settings['resolution']}. Resetting to default.")
                     self.settings['resolution'] = self.default_settings['resolution']
+                if self.settings['target_fps'] not in self.frame_rates:
+                    print(f"Invalid frame rate {self.settings['target_fps']}. Resetting to default.")
+                    self.settings['target_fps'] = self.default_settings['target_fps']
         except (FileNotFoundError, json.JSONDecodeError):
             print(f"Settings file not found or corrupted: {SETTINGS_FILE}. Using default settings.")
             self.settings = self.default_settings.copy()
@@ -104,4 +111,34 @@ class SettingsManager:
     @volume_sfx.setter
     def volume_sfx(self, value):
         self.settings['volume_sfx'] = max(0.0, min(1.0, value))
+        self.save_settings()
+
+    @property
+    def target_fps(self):
+        return self.settings['target_fps']
+
+    @target_fps.setter
+    def target_fps(self, value):
+        if value in self.frame_rates:
+            self.settings['target_fps'] = value
+            self.save_settings()
+        else:
+            print(f"Invalid frame rate {value}. Keeping current frame rate.")
+
+    @property
+    def vsync(self):
+        return self.settings['vsync']
+
+    @vsync.setter
+    def vsync(self, value):
+        self.settings['vsync'] = bool(value)
+        self.save_settings()
+
+    @property
+    def power_saving(self):
+        return self.settings['power_saving']
+
+    @power_saving.setter
+    def power_saving(self, value):
+        self.settings['power_saving'] = bool(value)
         self.save_settings()
\ No newline at end of file
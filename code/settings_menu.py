@@ -1,9 +1,11 @@
 import pygame
 from settings import *
+from text import text_cache
+from retained import RetainedStage
 
-class SettingsMenu:
+class SettingsMenu(RetainedStage):
     def __init__(self, font, switch_stage, settings_manager, game, update_sound_volumes):
-        self.display_surface = pygame.display.get_surface()
+        super().__init__()
         self.font = font
         self.switch_stage = switch_stage
         self.settings_manager = settings_manager
@@ -15,6 +17,9 @@ class SettingsMenu:
             {'name': 'Music', 'type': 'toggle', 'setting_key': 'music_on'},
             {'name': 'Music Volume', 'type': 'slider', 'setting_key': 'volume_music', 'min_val': 0.0, 'max_val': 1.0, 'step': 0.1},
             {'name': 'SFX Volume', 'type': 'slider', 'setting_key': 'volume_sfx', 'min_val': 0.0, 'max_val': 1.0, 'step': 0.1},
+            {'name': 'Frame Rate', 'type': 'frame_rate'},
+            {'name': 'Cap to Refresh Rate', 'type': 'toggle', 'setting_key': 'vsync'},
+            {'name': 'Power Saving', 'type': 'toggle', 'setting_key': 'power_saving'},
             {'name': 'Back', 'type': 'back'}
         ]
         self.selection_index = 0
@@ -28,6 +33,7 @@ class SettingsMenu:
         }
 
     def handle_event(self, event):
+        super().handle_event(event)
         if event.type == pygame.KEYDOWN:
             current_time = pygame.time.get_ticks()
             if current_time - self.last_selection_time > self.selection_cooldown:
@@ -56,6 +62,9 @@ class SettingsMenu:
                         self.settings_manager.resolution = self.settings_manager.resolutions[next_index]
                         self.update_display()
                         self.last_selection_time = current_time
+                    elif selected_option['type'] == 'frame_rate':
+                        self.change_frame_rate(1)
+                        self.last_selection_time = current_time
                     elif selected_option['type'] == 'slider':
                         current_val = getattr(self.settings_manager, selected_option['setting_key'])
                         new_val = min(selected_option['max_val'], current_val + selected_option['step'])
@@ -71,6 +80,9 @@ class SettingsMenu:
                         self.settings_manager.resolution = self.settings_manager.resolutions[prev_index]
                         self.update_display()
                         self.last_selection_time = current_time
+                    elif selected_option['type'] == 'frame_rate':
+                        self.change_frame_rate(-1)
+                        self.last_selection_time = current_time
                     elif selected_option['type'] == 'slider':
                         current_val = getattr(self.settings_manager, selected_option['setting_key'])
                         new_val = max(selected_option['min_val'], current_val - selected_option['step'])
@@ -78,18 +90,23 @@ class SettingsMenu:
                         self.update_sound_volumes()
                         self.last_selection_time = current_time
 
+    def change_frame_rate(self, step):
+        frame_rates = self.settings_manager.frame_rates
+        current_index = frame_rates.index(self.settings_manager.target_fps)
+        self.settings_manager.target_fps = frame_rates[(current_index + step) % len(frame_rates)]
+
     def update_display(self):
         pygame.display.set_mode(self.settings_manager.resolution, pygame.RESIZABLE)
         self.display_surface = pygame.display.get_surface()
         self.game.ui.update_display(self.settings_manager.resolution)
 
     def display_menu(self):
-        title_surf = self.font.render("Settings", True, self.colors['highlight'])
-        title_rect = title_surf.get_frect(center=(self.settings_manager.resolution[0] / 2, self.settings_manager.resolution[1] / 4))
+        title_surf = text_cache.render(self.font, "Settings", self.colors['highlight'])
+        title_rect = title_surf.get_frect(center=(self.settings_manager.resolution[0] / 2, self.settings_manager.resolution[1] / 8))
         self.display_surface.blit(title_surf, title_rect)
 
-        item_height = 60
-        start_y = self.settings_manager.resolution[1] / 2.5
+        item_height = 50
+        start_y = self.settings_manager.resolution[1] / 4
         for i, option in enumerate(self.options):
             is_selected = i == self.selection_index
             color = self.colors['highlight'] if is_selected else self.colors['available']
@@ -103,11 +120,14 @@ class SettingsMenu:
             elif option['type'] == 'slider':
                 current_value = getattr(self.settings_manager, option['setting_key'])
                 display_text += f": {int(current_value * 100)}%"
+            elif option['type'] == 'frame_rate':
+                target_fps = self.settings_manager.target_fps
+                display_text += f": {target_fps if target_fps else 'Unlimited'}"
 
-            item_surf = self.font.render(display_text, True, color)
+            item_surf = text_cache.render(self.font, display_text, color)
             item_rect = item_surf.get_frect(center=(self.settings_manager.resolution[0] / 2, start_y + i * item_height))
             self.display_surface.blit(item_surf, item_rect)
 
-    def run(self, dt):
+    def draw(self):
         self.display_surface.fill(self.colors['background'])
         self.display_menu()
\ No newline at end of file
@@ -0,0 +1,98 @@
+from settings import *
+from level import Level
+import random
+
+class SimulationClock:
+	def __init__(self):
+		self.ticks = 0
+
+	def advance(self, dt):
+		self.ticks += dt * 1000
+
+	def __call__(self):
+		return int(self.ticks)
+
+class KeyState:
+	def __init__(self, keys = ()):
+		self.keys = set(keys)
+
+	def __getitem__(self, key):
+		return key in self.keys
+
+class ScriptedInput:
+	def __init__(self, script):
+		# script is a list of (frames, keys) steps played back in order
+		self.script = [(frames, KeyState(keys)) for frames, keys in script]
+		self.no_keys = KeyState()
+		self.index = 0
+		self.remaining = self.script[0][0] if self.script else 0
+
+	def advance(self):
+		self.remaining -= 1
+		while self.remaining <= 0 and self.index < len(self.script) - 1:
+			self.index += 1
+			self.remaining = self.script[self.index][0]
+
+	def __call__(self):
+		return self.script[self.index][1] if self.remaining > 0 else self.no_keys
+
+class Simulation:
+	def __init__(self, game, level, seed = 0, dt = FIXED_DT, script = (), render = False):
+		self.dt = dt
+		self.render = render
+		self.clock = SimulationClock()
+		self.input = ScriptedInput(script)
+		self.result = None
+
+		random.seed(seed)
+		game.data.current_level = level
+		self.level = Level(
+			game.tmx_maps[level],
+			game.level_frames,
+			game.audio_files,
+			game.data,
+			self.finish,
+			game.text_system,
+			input_source = self.input,
+			clock = self.clock)
+
+	def finish(self, target, unlock = 0):
+		self.result = 'complete' if unlock > 0 else 'dead'
+
+	def step(self):
+		if self.render:
+			self.level.run(self.dt)
+		else:
+			self.level.update(self.dt)
+		self.input.advance()
+
+	def run(self, frames):
+		for frame in range(frames):
+			self.step()
+			if self.result:
+				return frame + 1
+		return frames
+
+if __name__ == '__main__':
+	import os
+	from argparse import ArgumentParser
+	from time import perf_counter
+
+	parser = ArgumentParser(description = 'Run a level headless with a fixed timestep')
+	parser.add_argument('--level', type = int, default = 0)
+	parser.add_argument('--frames', type = int, default = 3600)
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--fps', type = int, default = round(1 / FIXED_DT))
+	parser.add_argument('--render', action = 'store_true')
+	args = parser.parse_args()
+
+	os.environ['SDL_VIDEODRIVER'] = 'dummy'
+	os.environ['SDL_AUDIODRIVER'] = 'dummy'
+	from main import Game
+
+	game = Game(persist = False)
+	simulation = Simulation(game, args.level, args.seed, 1 / args.fps, [(args.frames, [pygame.K_RIGHT])], args.render)
+	start = perf_counter()
+	frames = simulation.run(args.frames)
+	elapsed = perf_counter() - start
+	print(f'{frames} frames in {elapsed:.2f}s ({frames / elapsed:.0f} fps), result: {simulation.result or "running"}')
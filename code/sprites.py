@@ -1,6 +1,5 @@
 from settings import * 
 from math import sin, cos, radians
-from random import randint
 
 class Sprite(pygame.sprite.Sprite):
 	def __init__(self, pos, surf = pygame.Surface((TILE_SIZE,TILE_SIZE)), groups = None, z = Z_LAYERS['main']):
@@ -13,6 +12,7 @@ class Sprite(pygame.sprite.Sprite):
 class AnimatedSprite(Sprite):
 	def __init__(self, pos, frames, groups, z = Z_LAYERS['main'], animation_speed = ANIMATION_SPEED):
 		self.frames, self.frame_index = frames, 0
+		self.animation = None
 		super().__init__(pos, self.frames[self.frame_index], groups, z)
 		self.animation_speed = animation_speed
 
@@ -74,32 +74,7 @@ class MovingSprite(AnimatedSprite):
 		self.flip = flip
 		self.reverse = {'x': False, 'y': False}
 
-	def check_border(self):
-		if self.move_dir == 'x':
-			if self.rect.right >= self.end_pos[0] and self.direction.x == 1:
-				self.direction.x = -1
-				self.rect.right = self.end_pos[0]
-			if self.rect.left <= self.start_pos[0] and self.direction.x == -1:
-				self.direction.x = 1
-				self.rect.left = self.start_pos[0]
-			self.reverse['x'] = True if self.direction.x < 0 else False
-		else:
-			if self.rect.bottom >= self.end_pos[1] and self.direction.y == 1:
-				self.direction.y = -1
-				self.rect.bottom = self.end_pos[1]
-			if self.rect.top <= self.start_pos[1] and self.direction.y == -1:
-				self.direction.y = 1
-				self.rect.top = self.start_pos[1]
-			self.reverse['y'] = True if self.direction.y > 0 else False
-
-	def update(self, dt):
-		self.old_rect = self.rect.copy()
-		self.rect.topleft += self.direction * self.speed * dt
-		self.check_border()
-
-		self.animate(dt)
-		if self.flip:
-			self.image = pygame.transform.flip(self.image, self.reverse['x'], self.reverse['y'])
+	# movement happens in Kinematics, which also picks the flipped frame after each step
 
 class Spike(Sprite):
 	def __init__(self, pos, surf, groups, radius, speed, start_angle, end_angle, z = Z_LAYERS['main']):
@@ -108,38 +83,8 @@ class Spike(Sprite):
 		self.speed = speed
 		self.start_angle = start_angle
 		self.end_angle = end_angle
-		self.angle = self.start_angle
-		self.direction = 1
-		self.full_circle = True if self.end_angle == -1 else False
-
-		y = self.center[1] + sin(radians(self.angle)) * self.radius
-		x = self.center[0] + cos(radians(self.angle)) * self.radius
-
-		super().__init__((x,y), surf, groups, z)
 
-	def update(self, dt):
-		self.angle += self.direction * self.speed * dt
-
-		if not self.full_circle:
-			if self.angle >= self.end_angle:
-				self.direction = -1
-			if self.angle < self.start_angle:
-				self.direction = 1
-
-
-		y = self.center[1] + sin(radians(self.angle)) * self.radius
-		x = self.center[0] + cos(radians(self.angle)) * self.radius
-		self.rect.center = (x,y)
-
-class Cloud(Sprite):
-	def __init__(self, pos, surf, groups, z = Z_LAYERS['clouds']):
-		super().__init__(pos, surf, groups, z)
-		self.speed = randint(50,120)
-		self.direction = -1
-		self.rect.midbottom = pos
-
-	def update(self, dt):
-		self.rect.x += self.direction * self.speed * dt
+		y = self.center[1] + sin(radians(self.start_angle)) * self.radius
+		x = self.center[0] + cos(radians(self.start_angle)) * self.radius
 
-		if self.rect.right <= 0:
-			self.kill()
\ No newline at end of file
+		super().__init__((x,y), surf, groups, z)
\ No newline at end of file
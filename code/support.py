@@ -1,10 +1,40 @@
 from settings import *
 from os import walk
-from os.path import join
+from os.path import join, normpath
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+decoded_images = {}
+loaded_images = {}
+flipped_frames = {}
+silhouettes = {}
+
+def preload_folders(folders, progress = None):
+    paths = []
+    for folder in folders:
+       for folder_path, _, image_names in walk(join(*folder)):
+          for image_name in image_names:
+             full_path = normpath(join(folder_path, image_name))
+             if image_name.endswith('.png') and full_path not in loaded_images and full_path not in decoded_images:
+                paths.append(full_path)
+
+    # decoding runs on worker threads, converting to the display format stays on the main thread
+    with ThreadPoolExecutor() as executor:
+       futures = {executor.submit(pygame.image.load, full_path): full_path for full_path in paths}
+       for done, future in enumerate(as_completed(futures), 1):
+          decoded_images[futures[future]] = future.result()
+          if progress:
+             progress(done, len(paths))
+
+def load_image(full_path, alpha = True):
+    full_path = normpath(full_path)
+    if full_path not in loaded_images:
+       surf = decoded_images.pop(full_path) if full_path in decoded_images else pygame.image.load(full_path)
+       loaded_images[full_path] = surf.convert_alpha() if alpha else surf.convert()
+    return loaded_images[full_path]
 
 def import_image(*path, alpha = True, format = 'png'):
     full_path = join(*path) + f'.{format}'
-    return pygame.image.load(full_path).convert_alpha() if alpha else pygame.image.load(full_path).convert()
+    return load_image(full_path, alpha)
 
 def import_folder(*path):
     frames = []
@@ -15,7 +45,7 @@ def import_folder(*path):
        )
        for image_name in valid_image_names:
           full_path = join(folder_path, image_name)
-          frames.append(pygame.image.load(full_path).convert_alpha())
+          frames.append(load_image(full_path))
     return frames
 
 def import_folder_dict(*path):
@@ -23,7 +53,7 @@ def import_folder_dict(*path):
     for folder_path, _, image_names in walk(join(*path)):
        for image_name in image_names:
           full_path = join(folder_path, image_name)
-          surface = pygame.image.load(full_path).convert_alpha()
+          surface = load_image(full_path)
           frame_dict[image_name.split('.')[0]] = surface
     return frame_dict
 
@@ -33,4 +63,77 @@ def import_sub_folders(*path):
        if sub_folders:
           for sub_folder in sub_folders:
              frame_dict[sub_folder] = import_folder(*path, sub_folder)
-    return frame_dict
\ No newline at end of file
+    return frame_dict
+
+def flip_surfaces(frames, flip_x, flip_y):
+    if isinstance(frames, pygame.Surface):
+       return pygame.transform.flip(frames, flip_x, flip_y)
+    if isinstance(frames, dict):
+       return {key: flip_surfaces(value, flip_x, flip_y) for key, value in frames.items()}
+    return [flip_surfaces(value, flip_x, flip_y) for value in frames]
+
+def flip_frames(frames, flip_x = True, flip_y = False):
+    if not flip_x and not flip_y:
+       return frames
+    # the source is kept alongside the flipped set so its id can't be reused
+    key = (id(frames), flip_x, flip_y)
+    if key not in flipped_frames:
+       flipped_frames[key] = (frames, flip_surfaces(frames, flip_x, flip_y))
+    return flipped_frames[key][1]
+
+def silhouette(surf):
+    if id(surf) not in silhouettes:
+       white_surf = pygame.mask.from_surface(surf).to_surface()
+       white_surf.set_colorkey('black')
+       silhouettes[id(surf)] = (surf, white_surf)
+    return silhouettes[id(surf)][1]
+
+def collect_surfaces(frames, surfaces):
+    if isinstance(frames, pygame.Surface):
+       surfaces[id(frames)] = frames
+    elif isinstance(frames, dict):
+       for value in frames.values():
+          collect_surfaces(value, surfaces)
+    elif isinstance(frames, list):
+       for value in frames:
+          collect_surfaces(value, surfaces)
+
+def replace_surfaces(frames, packed):
+    if isinstance(frames, pygame.Surface):
+       return packed.get(id(frames), frames)
+    if isinstance(frames, dict):
+       return {key: replace_surfaces(value, packed) for key, value in frames.items()}
+    if isinstance(frames, list):
+       return [replace_surfaces(value, packed) for value in frames]
+    return frames
+
+def build_atlas(frames, page_size = 2048):
+    surfaces = {}
+    collect_surfaces(frames, surfaces)
+
+    # packed at startup rather than offline: one extra blit per image while loading, and the pages always match the
+    # current graphics folder with no build step to forget
+    # shelf packing, tallest first; surfaces too big for a page stay on their own
+    placements, page_heights = {}, [0]
+    x = y = shelf_height = 0
+    for key, surf in sorted(surfaces.items(), key = lambda item: item[1].get_height(), reverse = True):
+       width, height = surf.get_size()
+       if width > page_size or height > page_size:
+          print(f"Atlas: {width}x{height} surface does not fit a {page_size}x{page_size} page, keeping it unpacked.")
+          continue
+       if x + width > page_size:
+          x, y, shelf_height = 0, y + shelf_height, 0
+       if y + height > page_size:
+          page_heights.append(0)
+          x = y = shelf_height = 0
+       placements[key] = (len(page_heights) - 1, x, y)
+       page_heights[-1] = max(page_heights[-1], y + height)
+       x += width
+       shelf_height = max(shelf_height, height)
+
+    pages = [pygame.Surface((page_size, height), pygame.SRCALPHA).convert_alpha() for height in page_heights if height]
+    packed = {}
+    for key, (page, x, y) in placements.items():
+       pages[page].blit(surfaces[key], (x, y))
+       packed[key] = pages[page].subsurface((x, y, *surfaces[key].get_size()))
+    return replace_surfaces(frames, packed)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from grid import TileGrid, SOLID, SEMI_SOLID
+
+
+def test_tile_aligned_rect_marks_only_its_own_cells():
+    grid = TileGrid(4, 4, cell_size=64)
+    grid.mark_rect(pygame.FRect(64, 64, 64, 64), SOLID)
+    assert [(col, row) for row in range(4) for col in range(4) if grid.get(col, row)] == [(1, 1)]
+
+
+def test_tile_aligned_rect_does_not_see_neighbouring_cells():
+    grid = TileGrid(4, 4, cell_size=64)
+    grid.set(2, 1, SOLID)
+    grid.set(1, 2, SOLID)
+    assert not grid.in_rect(pygame.FRect(64, 64, 64, 64))
+    assert grid.in_rect(pygame.FRect(64, 64, 65, 64))
+
+
+def test_unaligned_rect_marks_every_cell_it_touches():
+    grid = TileGrid(4, 4, cell_size=64)
+    grid.mark_rect(pygame.FRect(32, 32, 64, 64), SEMI_SOLID)
+    assert [(col, row) for row in range(4) for col in range(4) if grid.get(col, row)] == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert grid.in_rect(pygame.FRect(95, 95, 1, 1), SEMI_SOLID)
+    assert not grid.in_rect(pygame.FRect(95, 95, 1, 1), SOLID)
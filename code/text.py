@@ -1,19 +1,72 @@
 import pygame
+from collections import OrderedDict
 from settings import WINDOW_WIDTH, WINDOW_HEIGHT
 from timer import Timer
 
+fonts = {}
+
+
+def get_font(path, size):
+    if (path, size) not in fonts:
+        fonts[(path, size)] = pygame.font.Font(path, size)
+    return fonts[(path, size)]
+
+
+class TextCache:
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        if key in self.surfaces:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return self.surfaces[key]
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        size = self.surface_bytes(surf)
+        if size > self.max_bytes:
+            # caching it would evict everything else and still not fit, so hand it back uncached
+            return surf
+        self.surfaces[key] = surf
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.size -= self.surface_bytes(evicted)
+            self.evictions += 1
+        return surf
+
+    @staticmethod
+    def surface_bytes(surf):
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def stats(self):
+        return {'entries': len(self.surfaces), 'bytes': self.size, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+text_cache = TextCache()
+
 
 class TextSystem:
     def __init__(self, font_path, font_size=30):
-        self.font = pygame.font.Font(font_path, font_size)
+        self.font = get_font(font_path, font_size)
         self.messages = []
         self.current_message = None
-        self.timer = Timer(2000)
+        self.message_surfs = None
+        self.timer = Timer(2000, clock=pygame.time.get_ticks)
 
     def clear(self):
         self.messages = []
         self.current_message = None
-        self.timer = Timer(5000)
+        self.message_surfs = None
+        self.timer = Timer(5000, clock=pygame.time.get_ticks)
 
     def add_message(self, text, duration=2000):
         self.messages.append((text, duration))
@@ -22,7 +75,8 @@ class TextSystem:
         if not self.current_message and self.messages:
             text, duration = self.messages.pop(0)
             self.current_message = text
-            self.timer = Timer(duration)
+            self.message_surfs = None
+            self.timer = Timer(duration, clock=pygame.time.get_ticks)
             self.timer.activate()
 
         if self.current_message:
@@ -32,12 +86,16 @@ class TextSystem:
 
     def draw(self, surface):
         if self.current_message:
-            text_surf = self.font.render(self.current_message, True, (255, 255, 255))
+            if not self.message_surfs:
+                text_surf = text_cache.render(self.font, self.current_message, (255, 255, 255))
+                bg_surf = pygame.Surface(text_surf.get_rect().inflate(20, 10).size, pygame.SRCALPHA)
+                pygame.draw.rect(bg_surf, (0, 0, 0, 180), bg_surf.get_rect(), border_radius=5)
+                self.message_surfs = text_surf, bg_surf
+            text_surf, bg_surf = self.message_surfs
             text_rect = text_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 50))
-
             bg_rect = text_rect.inflate(20, 10)
-            bg_surf = pygame.Surface(bg_rect.size, pygame.SRCALPHA)
-            pygame.draw.rect(bg_surf, (0, 0, 0, 180), bg_surf.get_rect(), border_radius=5)
 
             surface.blit(bg_surf, bg_rect)
-            surface.blit(text_surf, text_rect)
\ No newline at end of file
+            surface.blit(text_surf, text_rect)
+            return [bg_rect]
+        return []
\ No newline at end of file
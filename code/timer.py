@@ -1,8 +1,26 @@
-from pygame.time import get_ticks
+from pygame.time import get_ticks as pygame_ticks
+from contextlib import contextmanager
+
+clock = pygame_ticks
+
+def get_ticks():
+	return clock()
+
+@contextmanager
+def use_clock(new_clock = None):
+	# swaps the gameplay clock for the duration of the block, None means wall time
+	global clock
+	previous = clock
+	clock = new_clock or pygame_ticks
+	try:
+		yield
+	finally:
+		clock = previous
 
 class Timer:
-	def __init__(self, duration, func = None, repeat = False):
+	def __init__(self, duration, func = None, repeat = False, clock = get_ticks):
 		self.duration = duration
+		self.clock = clock
 		self.func = func
 		self.start_time = 0
 		self.active = False
@@ -10,7 +28,7 @@ class Timer:
 
 	def activate(self):
 		self.active = True
-		self.start_time = get_ticks()
+		self.start_time = self.clock()
 
 	def deactivate(self):
 		self.active = False
@@ -19,7 +37,7 @@ class Timer:
 			self.activate()
 
 	def update(self):
-		current_time = get_ticks()
+		current_time = self.clock()
 		if current_time - self.start_time >= self.duration:
 			if self.func and self.start_time != 0:
 				self.func()
@@ -1,11 +1,14 @@
 from settings import *
 from sprites import AnimatedSprite
+from animation import Animations
 from timer import Timer
+from text import text_cache
 
 class UI:
     def __init__(self, font, frames):
         self.display_surface = pygame.display.get_surface()
         self.sprites = pygame.sprite.Group()
+        self.animations = Animations()
         self.font = font
 
         self.heart_frames = frames['heart']
@@ -17,7 +20,8 @@ class UI:
         self.base_hearts_count = 3
 
         self.coin_amount = 0
-        self.coin_timer = Timer(1000)
+        # interface timers keep wall time even while a level runs on its own clock
+        self.coin_timer = Timer(1000, clock=pygame.time.get_ticks)
         self.coin_surf = frames['coin']
 
     def create_hearts(self, current_health):
@@ -31,7 +35,7 @@ class UI:
             x = 10 + i * (self.heart_surf_width + self.heart_padding)
             y = 10
             if i < num_base_hearts:
-                Heart((x, y), self.heart_frames, self.sprites, 'full')
+                Heart((x, y), self.heart_frames, (self.sprites, self.animations), 'full')
             else:
                 Heart((x, y), self.heart_empty_frames, self.sprites, 'empty')
 
@@ -41,13 +45,16 @@ class UI:
             Heart((x, y), self.heart_bonus_frames, self.sprites, 'bonus')
 
     def display_text(self):
+        rects = []
         if self.coin_timer.active:
-            text_surf = self.font.render(str(self.coin_amount), False, '#33323d')
+            text_surf = text_cache.render(self.font, str(self.coin_amount), '#33323d', False)
             text_rect = text_surf.get_frect(topleft=(16, 34))
             self.display_surface.blit(text_surf, text_rect)
 
             coin_rect = self.coin_surf.get_frect(center=text_rect.bottomleft).move(0, -6)
             self.display_surface.blit(self.coin_surf, coin_rect)
+            rects = [text_rect, coin_rect]
+        return rects
 
     def show_coins(self, amount):
         self.coin_amount = amount
@@ -62,9 +69,10 @@ class UI:
 
     def update(self, dt):
         self.coin_timer.update()
-        self.sprites.update(dt)
-        self.sprites.draw(self.display_surface)
-        self.display_text()
+        self.animations.update(dt)
+        animated = self.animations.spritedict
+        self.display_surface.fblits([(sprite.animation.image if sprite in animated else sprite.image, sprite.rect) for sprite in self.sprites])
+        return [sprite.rect for sprite in self.sprites] + self.display_text()
 
 class Heart(AnimatedSprite):
     def __init__(self, pos, frames, groups, heart_type='full'):